@@ -0,0 +1,53 @@
+"""
+How StyleSheet.attach scales with the number of rules in the stylesheet.
+
+Compares the indexed attach against the previous full scan over every rule.
+"""
+
+import random
+
+from common import TYPES, best_of, make_css, report
+
+from sterling.csslavie import PropertyObject
+from sterling.csslavie.parse import StyleSheet, Names
+
+OBJECTS = 500
+
+
+def make_objects(count, rules, seed=1):
+    rnd = random.Random(seed)
+    objs = []
+    for _ in range(count):
+        cls = type(rnd.choice(TYPES), (PropertyObject,), {})
+        objs.append(cls(name=rnd.choice(TYPES),
+                        classes=['c%d' % rnd.randrange(rules)]))
+    return objs
+
+
+def full_scan(sheet, obj):
+    names = Names()
+    names.add(type(obj).__name__)
+    names.add(obj.name, '#')
+    names.set_parent(None)
+    for c in obj.classes:
+        names.add(c, '.')
+    for (ns, style) in sheet._rules:
+        if names.match(ns):
+            obj.add_to(style)
+
+
+def main():
+    rows = []
+    for rules in (10, 100, 1000, 5000):
+        sheet = StyleSheet(make_css(rules))
+        objs = make_objects(OBJECTS, rules)
+        scan = best_of(lambda: [full_scan(sheet, o) for o in objs])
+        indexed = best_of(lambda: [sheet.attach(o) for o in objs])
+        rows.append((rules, scan * 1e6 / OBJECTS, indexed * 1e6 / OBJECTS,
+                     scan / indexed))
+    report('attach cost per object (%d objects)' % OBJECTS, rows,
+           ('rules', 'scan us/obj', 'index us/obj', 'speedup'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Attaching deep and wide trees.
+
+Every object in the deep trees has its own chain of parents, so each one is
+matched against the descendant rules of the theme. As in a real window,
+the tree only uses a few of the classes the theme has rules for. The ancestry bloom lets
+Selector.match skip walking up the parents for rules whose parent names
+are not all there; the 'walk' column matches without it.
+"""
+
+import random
+
+from common import TYPES, best_of, make_css, report
+
+from sterling.csslavie import PropertyObject
+from sterling.csslavie.parse import StyleSheet, Selector
+
+RULES = 1000
+USED = 20
+CLASSES = dict((name, type(name, (PropertyObject,), {})) for name in TYPES)
+
+
+def walk_match(self, names):
+    return self[0][0] <= names and self._match_parents(names, 1)
+
+
+def make_node(rnd):
+    cls = CLASSES[rnd.choice(TYPES)]
+    return cls(name=rnd.choice(TYPES), classes=['c%d' % rnd.randrange(USED)])
+
+
+def make_deep(depth, seed=0):
+    rnd = random.Random(seed)
+    root = item = make_node(rnd)
+    for _ in range(depth):
+        item.children = [make_node(rnd)]
+        item = item.children[0]
+    return root
+
+
+def make_wide(width, seed=0):
+    rnd = random.Random(seed)
+    root = make_node(rnd)
+    root.children = []
+    for _ in range(width):
+        box = make_node(rnd)
+        box.children = [make_node(rnd) for _ in range(10)]
+        root.children.append(box)
+    return root
+
+
+def main():
+    css = make_css(RULES)
+    rows = []
+    bloom_match = Selector.match
+    for (name, make, size) in (('deep', make_deep, 500),
+                               ('deep', make_deep, 2000),
+                               ('wide', make_wide, 500)):
+        times = []
+        for match in (walk_match, bloom_match):
+            Selector.match = match
+            try:
+                times.append(best_of(
+                    lambda: StyleSheet(css).attach_all(make(size))))
+            finally:
+                Selector.match = bloom_match
+        rows.append(('%s %d' % (name, size), times[0] * 1e3, times[1] * 1e3,
+                     times[0] / times[1]))
+    report('attach_all with %d rules' % RULES, rows,
+           ('tree', 'walk ms', 'bloom ms', 'speedup'))
+
+
+if __name__ == '__main__':
+    main()
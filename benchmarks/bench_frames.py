@@ -0,0 +1,87 @@
+"""
+Frame instantiation.
+
+Builds the widgets of a list frame for many data items with a stub
+backend, so only the frame machinery is measured.
+"""
+
+from common import best_of, report
+
+from sterling.frame import Frame
+from sterling.model import Model
+
+
+class StubWidget(object):
+    def __init__(self, data, parent, frame):
+        self.data = data
+        self.frame = frame
+
+    def raw(self):
+        return self
+
+
+class StubContainer(StubWidget):
+    def __init__(self, data, parent, frame):
+        super(StubContainer, self).__init__(data, parent, frame)
+        self.children = []
+
+    def raw_contents(self):
+        return self
+
+    def add(self, child):
+        self.children.append(child)
+
+
+class Benchlist(Frame):
+    _Widget = StubContainer
+
+    def make_widget(self, data, parent=None):
+        return self._Widget(data, parent, self)
+
+
+class Benchrow(Benchlist):
+    pass
+
+
+class Benchlabel(Frame):
+    class _Widget(StubWidget):
+        def __init__(self, data, parent, frame):
+            super(Benchlabel._Widget, self).__init__(data, parent, frame)
+            self.text = frame.plan().getters['text'](data)
+
+    def make_widget(self, data, parent=None):
+        return self._Widget(data, parent, self)
+
+
+class Item(Model):
+    def __init__(self, n):
+        super(Item, self).__init__()
+        self.title = 'item %d' % n
+        self.detail = n
+
+
+class Items(object):
+    def __init__(self, count):
+        self.items = [Item(n) for n in range(count)]
+
+
+def make_frame():
+    row = Benchrow(attrs={}, children=[
+        Benchlabel(attrs={'text': 'title'}, children=[]),
+        Benchlabel(attrs={'text': 'detail'}, children=[])])
+    return Benchlist(attrs={'ctx': 'items'}, children=[row])
+
+
+def main():
+    rows = []
+    for count in (100, 1000, 10000):
+        data = Items(count)
+        fr = make_frame()
+        taken = best_of(lambda: fr.widget(data), repeat=7)
+        rows.append((count, count * 3 / taken))
+    report('widgets instantiated per second (stub backend)', rows,
+           ('items', 'widgets/s'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+"""
+Import time of the sterling modules.
+
+Each module is imported in a fresh interpreter, the way a command line
+tool validating frames or stylesheets would start, and the best of several
+runs is reported along with whether a toolkit got imported.
+"""
+
+import sys
+import subprocess
+
+from common import report
+
+MODULES = ['sterling.csslavie', 'sterling.frame', 'sterling.widget',
+           'sterling.app']
+
+SCRIPT = '''
+import sys, time
+start = time.time()
+import %s
+print('%%f %%d %%d' %% (time.time() - start, len(sys.modules),
+                      'efl' in sys.modules))
+'''
+
+
+def main():
+    base = subprocess.check_output(
+        [sys.executable, '-c', 'import sys; print(len(sys.modules))'])
+    rows = []
+    for module in MODULES:
+        runs = [subprocess.check_output(
+            [sys.executable, '-c', SCRIPT % module]).split() for _ in range(5)]
+        best = min(float(run[0]) for run in runs)
+        rows.append((module, best * 1e3, int(runs[0][1]) - int(base),
+                     bool(int(runs[0][2]))))
+    report('import time', rows, ('module', 'ms', 'new modules', 'efl'))
+
+
+if __name__ == '__main__':
+    main()
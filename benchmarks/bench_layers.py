@@ -0,0 +1,56 @@
+"""
+Cost of reading and changing layered properties as the layer count grows.
+
+Toggles a two key 'hover' layer on an object with many layers, reads every
+property as a widget redrawing after a state change would, and refreshes
+every property.
+"""
+
+import time
+
+from common import report
+
+from sterling.csslavie import PropertyObject
+
+KEYS = 50
+ROUNDS = 2000
+
+
+class Styled(PropertyObject):
+    pass
+
+
+def make_object(layers):
+    obj = Styled()
+    for n in range(layers):
+        obj.add_to(dict(('p%d' % k, n) for k in range(n, KEYS, layers)),
+                   'layer%d' % n)
+    return obj
+
+
+def main():
+    rows = []
+    names = ['p%d' % k for k in range(KEYS)]
+    for layers in (1, 4, 16, 64):
+        obj = make_object(layers)
+        start = time.time()
+        for _ in xrange(ROUNDS):
+            obj.add_to({'p1': 'on', 'p2': 'on'}, 'hover')
+            obj.remove('hover')
+        toggle = (time.time() - start) / ROUNDS
+        start = time.time()
+        for _ in xrange(ROUNDS):
+            for name in names:
+                getattr(obj, name)
+        read = (time.time() - start) / ROUNDS / KEYS
+        start = time.time()
+        for _ in xrange(ROUNDS):
+            obj.refresh()
+        refresh = (time.time() - start) / ROUNDS
+        rows.append((layers, toggle * 1e6, read * 1e9, refresh * 1e6))
+    report('layered properties (%d keys)' % KEYS, rows,
+           ('layers', 'toggle us', 'read ns/key', 'refresh us'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Loading large frame files.
+
+Generates a frame file with many rows and loads it by parsing the whole
+tree and converting it, as frame.from_file used to, with from_file
+without the cache, through the cache the first time (parsing into a spec
+sharing identical rows, then building it) and a second time from the
+cache, which only builds the frames. Each method runs in its own process so
+that its peak memory can be reported; that of the cached method includes
+filling the cache.
+"""
+
+import os
+import sys
+import resource
+import tempfile
+import subprocess
+import xml.etree.cElementTree as ET
+
+from common import best_of, report
+
+from sterling import frame
+from sterling.frame import Frame
+
+
+class Benchbox(Frame):
+    def make_widget(self, data, parent=None):
+        pass
+
+
+class Benchlabel(Frame):
+    def make_widget(self, data, parent=None):
+        pass
+
+
+METHODS = ('tree', 'stream', 'first', 'cached')
+
+
+def make_file(rows):
+    fhl, path = tempfile.mkstemp(suffix='.xml')
+    with os.fdopen(fhl, 'w') as fhl:
+        fhl.write('<benchbox ctx="items">\n')
+        for n in range(rows):
+            fhl.write('  <benchbox class="row r%d">' % (n % 10))
+            fhl.write('<benchlabel text="title" /><benchlabel text="detail" '
+                      'class="small" /></benchbox>\n')
+        fhl.write('</benchbox>\n')
+    return path
+
+
+def load_tree(path):
+    return frame._from_xml(ET.parse(path).getroot())
+
+
+def load_stream(path):
+    return frame.from_file(path, cached=False)
+
+
+def load_first(path):
+    return frame.from_file(path)
+
+
+def measure(method, path):
+    """Loads path with method in this process, printing time and peak rss"""
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if method == 'cached':
+        frame.from_file(path)
+        method = 'first'
+    load = globals()['load_' + method]
+    taken = best_of(lambda: load(path), repeat=1)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print('%f %d' % (taken, peak - base))
+
+
+def main():
+    results = []
+    for rows in (1000, 10000, 50000):
+        path = make_file(rows)
+        row = [rows]
+        for method in METHODS:
+            out = subprocess.check_output(
+                [sys.executable, __file__, method, path])
+            taken, peak = out.split()
+            row += [float(taken) * 1e3, int(peak) / 1024.0]
+        os.unlink(path)
+        results.append(tuple(row))
+    print('rows of ten distinct templates')
+    report('frame file loading (ms)', [row[:1] + row[1::2] for row in results],
+           ('rows',) + METHODS)
+    report('frame file loading (peak MB)',
+           [row[:1] + row[2::2] for row in results], ('rows',) + METHODS)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3:
+        measure(*sys.argv[1:])
+    else:
+        main()
@@ -0,0 +1,81 @@
+"""
+Selector match calls per second.
+
+Compares compiled Selector matching with the previous Names.match, which
+split the '*' joined selector string on every call (kept here as
+`legacy_match` only for comparison).
+"""
+
+import time
+
+from common import report
+
+from sterling.csslavie.parse import Names, Selector
+
+CALLS = 200000
+
+SELECTORS = [
+    'button',
+    'button .primary #ok',
+    'window*button',
+    'window .main*>*box*button .primary',
+]
+
+
+def legacy_match(names, ns):
+    if type(ns) is str:
+        ns = ns.split('*')
+    (sublist, rest) = (ns[-1], ns[:-1])
+
+    if type(sublist) is str:
+        sublist = sublist.split(' ')
+
+    for name in sublist:
+        if name not in names:
+            return False
+
+    if not rest or not getattr(names, 'parent', None):
+        return not bool(rest)
+
+    if rest[-1] == '>':
+        return legacy_match(names.parent, rest[:-1])
+
+    parent = names.parent
+    while parent and legacy_match(parent, rest):
+        parent = getattr(parent, 'parent', None)
+    return bool(parent)
+
+
+def make_names():
+    parent = None
+    for keys in (['window', '.main'], ['box'], ['button', '.primary', '#ok']):
+        names = Names()
+        for key in keys:
+            names.add(key)
+        names.set_parent(parent)
+        parent = names
+    return names
+
+
+def rate(func, *args):
+    start = time.time()
+    for _ in xrange(CALLS):
+        func(*args)
+    return CALLS / (time.time() - start)
+
+
+def main():
+    names = make_names()
+    rows = []
+    for ns in SELECTORS:
+        selector = Selector.compile(ns)
+        legacy = rate(legacy_match, names, ns)
+        compiled = rate(selector.match, names)
+        rows.append((len(selector), legacy / 1e3, compiled / 1e3,
+                     compiled / legacy))
+    report('match calls per second (thousands)', rows,
+           ('compounds', 'string k/s', 'compiled k/s', 'speedup'))
+
+
+if __name__ == '__main__':
+    main()
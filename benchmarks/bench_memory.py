@@ -0,0 +1,84 @@
+"""
+Memory used by each styled PropertyObject, in bytes per object.
+
+Uses tracemalloc where the interpreter has it. Otherwise it walks everything
+reachable from the objects with sys.getsizeof, counting each object only
+once and leaving out what the stylesheet and the classes hold.
+"""
+
+import gc
+import sys
+
+from common import make_css, report
+
+from sterling.csslavie import PropertyObject
+from sterling.csslavie.parse import StyleSheet
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+OBJECTS = 20000
+
+
+class Row(PropertyObject):
+    pass
+
+
+def make_rows(sheet, count):
+    root = Row(name='list', classes=['c1'])
+    root.children = [Row(name='row', classes=['c2', 'c3'])
+                     for _ in range(count)]
+    sheet.attach_all(root)
+    return root
+
+
+def reachable(roots, skip):
+    """Returns the total size of everything reachable from roots, except
+    for objects in skip (by id) and classes, modules and functions"""
+    seen = set(skip)
+    stack = list(roots)
+    total = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, (type, type(sys))) \
+                or callable(obj) and not hasattr(obj, '__dict__'):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        stack.extend(gc.get_referents(obj))
+    return total, seen
+
+
+def walk_size(sheet, count):
+    (_, shared) = reachable([sheet, make_rows(sheet, 1)], ())
+    rows = make_rows(sheet, count)
+    (total, _) = reachable(rows.children, shared)
+    return float(total) / count
+
+
+def traced_size(sheet, count):
+    make_rows(sheet, 1)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    rows = make_rows(sheet, count)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return float(after - before) / count
+
+
+def main():
+    sheet = StyleSheet(make_css(200) + '\n'.join(
+        'row.c2 { p%d: %d; }' % (n, n) for n in range(20)))
+    if tracemalloc is not None:
+        (method, size) = ('tracemalloc', traced_size(sheet, OBJECTS))
+    else:
+        (method, size) = ('getsizeof walk', walk_size(sheet, OBJECTS))
+    report('memory per styled object (%d objects, 22 properties)' % OBJECTS,
+           [(method, size)], ('measured by', 'bytes/object'))
+
+
+if __name__ == '__main__':
+    main()
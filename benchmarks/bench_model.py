@@ -0,0 +1,41 @@
+"""
+Model change dispatch.
+
+A button callback assigns many fields of a model, each watched by the same
+widget, and then calls do_updates; this counts the widget updates and
+times the whole round.
+"""
+
+import time
+
+from common import report
+
+from sterling.model import Model
+
+ROUNDS = 2000
+
+
+def main():
+    rows = []
+    for fields in (1, 4, 16, 64):
+        model = Model()
+        calls = [0]
+
+        def update(data):
+            calls[0] += 1
+        for n in range(fields):
+            model.subscribe('f%d' % n, update)
+        names = ['f%d' % n for n in range(fields)]
+        start = time.time()
+        for value in xrange(ROUNDS):
+            for name in names:
+                setattr(model, name, value)
+            model.do_updates()
+        taken = (time.time() - start) / ROUNDS
+        rows.append((fields, calls[0] / ROUNDS, taken * 1e6))
+    report('set every field then do_updates', rows,
+           ('fields', 'updates', 'round us'))
+
+
+if __name__ == '__main__':
+    main()
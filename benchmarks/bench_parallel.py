@@ -0,0 +1,72 @@
+"""
+Multi-file themes and parallel matching.
+
+Builds one stylesheet from a theme split over many files, and attaches a
+tree of independent subtrees with share_styles off (the case where every
+object is matched), with 1, 2, 4 and 8 worker processes. Worker processes
+are started for each call, so their start up cost is part of the timing.
+"""
+
+import os
+import time
+import random
+import shutil
+import tempfile
+import multiprocessing
+
+from common import TYPES, best_of, make_css, report
+
+from sterling.csslavie import PropertyObject
+from sterling.csslavie.parse import StyleSheet
+
+FILES = 32
+RULES = 500
+SUBTREES = 8
+OBJECTS = 500
+
+
+def make_tree(rules, seed=0):
+    rnd = random.Random(seed)
+    root = PropertyObject(name='window')
+    root.children = []
+    for _ in range(SUBTREES):
+        box = PropertyObject(name='box')
+        box.children = [PropertyObject(name=rnd.choice(TYPES),
+                                       classes=['c%d' % rnd.randrange(rules)])
+                        for _ in range(OBJECTS)]
+        root.children.append(box)
+    return root
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    try:
+        files = []
+        for n in range(FILES):
+            files.append(os.path.join(tmp, '%d.css' % n))
+            with open(files[-1], 'w') as fhl:
+                fhl.write(make_css(RULES, seed=n))
+
+        sheet = StyleSheet.from_files(files)
+        sheet.share_styles = False
+        rows = []
+        for workers in (1, 2, 4, 8):
+            parse = best_of(lambda: StyleSheet.from_files(files, workers))
+            attach = None
+            for _ in range(3):
+                tree = make_tree(FILES * RULES)
+                start = time.time()
+                sheet.attach_all(tree, workers=workers)
+                taken = time.time() - start
+                attach = taken if attach is None else min(attach, taken)
+            rows.append((workers, parse * 1e3, attach * 1e3))
+        report('%d files of %d rules, %d objects, %d cpus' % (
+                   FILES, RULES, SUBTREES * OBJECTS,
+                   multiprocessing.cpu_count()),
+               rows, ('workers', 'parse ms', 'attach ms'))
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    main()
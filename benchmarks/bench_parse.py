@@ -0,0 +1,86 @@
+"""
+Css parsing throughput, in MB of css per second.
+
+Compares the single pass tokenizing parser with the string slicing parser it
+replaced, which is kept here (as `legacy_parse_css`) only for comparison.
+"""
+
+from common import best_of, make_css, report
+
+from sterling.csslavie.parse import _parse_css, CssValueFilters, GLOBAL_FILTERS
+
+
+def _block(string, f1, f2, s):
+    i = string.find(f1, s)
+    j = string.find(f2, i)
+    return (i, j)
+
+
+def _parse(string, sep='=', eol='\n', vtype=str, ktype=str, start=0):
+    result = []
+    while True:
+        (i, j) = _block(string, sep, eol, start)
+        if i < 0 or j < 0 or j < i:
+            break
+        name = string[start:i].strip()
+        keys = ktype(name)
+        value = vtype(string[i+1:j].strip())
+        if not isinstance(keys, list):
+            keys = [ keys ]
+        for key in keys:
+            result.append((key,value))
+        start = j+1
+    return result
+
+
+def _remove(string, left, right):
+    start = 0
+    while True:
+        (i, j) = _block(string, left, right, start)
+        if i < 0 or j < 0 or j < i:
+            break
+        string = string[:i] + string[j+2:]
+        start = i
+    return string
+
+
+def _parse_names(content):
+    result = []
+    for name in content.replace('>', ' > ').split():
+        for char in '.#:':
+            name = name.replace(char, ' '+char)
+        result.append( name.strip() )
+    return result
+
+
+def legacy_parse_css(content, filters=None):
+    filters = filters or CssValueFilters(*GLOBAL_FILTERS)
+    content = _remove(content, '/*', '*/')
+    content = _remove(content, '//', '\n')
+    return _parse(content, '{', '}',
+        ktype=lambda c: [ _parse_names(p) for p in c.split(',') ],
+        vtype=lambda c: dict( _parse(c,":",";", vtype=filters))
+    )
+
+
+def commented(content):
+    """Adds a comment before every rule, as heavily documented themes do"""
+    return content.replace('}\n', '}\n/* A comment about the next rule */\n')
+
+
+def main():
+    rows = []
+    for rules in (100, 1000, 5000):
+        for (label, content) in (('plain', make_css(rules)),
+                                 ('commented', commented(make_css(rules)))):
+            mb = len(content) / 1e6
+            legacy = best_of(lambda: legacy_parse_css(content))
+            current = best_of(lambda: _parse_css(content))
+            rows.append((rules, label, mb / legacy, mb / current,
+                         legacy / current))
+    report('css parsing throughput', rows,
+           ('rules', 'content', 'legacy MB/s', 'single MB/s', 'speedup'))
+
+
+if __name__ == '__main__':
+    main()
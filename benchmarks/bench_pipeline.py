@@ -0,0 +1,63 @@
+"""
+End to end frame -> widget -> model update cost on the null backend.
+
+Builds a window with a button for each row of a list model, then times
+updating every row's title, and appending rows through the model's
+deltas.
+"""
+
+import time
+import xml.etree.ElementTree as ET
+
+from common import best_of, report
+
+from sterling import backends, frame, widget
+from sterling.backends import null
+from sterling.model import Model, ListModel
+
+FRAME = '<window ctx="items"><button text="title" /></window>'
+
+
+class Item(Model):
+    def __init__(self, n):
+        super(Item, self).__init__()
+        self.title = 'item %d' % n
+
+
+class Items(Model):
+    def __init__(self, count):
+        super(Items, self).__init__()
+        self.items = ListModel(Item(n) for n in range(count))
+
+
+def main():
+    backends.use(null.Backend(record=False))
+    fr = frame._from_xml(ET.fromstring(FRAME))
+    rows = []
+    for count in (100, 1000, 10000):
+        data = Items(count)
+        build = best_of(lambda: fr.widget(data))
+        win = fr.widget(data)
+
+        def update():
+            for item in data.items:
+                item.title += '.'
+                item.do_updates()
+        changed = best_of(update)
+
+        def append():
+            for n in range(100):
+                data.items.append(Item(n))
+            data.items.do_updates()
+            for n in range(100):
+                data.items.pop()
+            data.items.do_updates()
+        grown = best_of(append)
+        rows.append((count, build * 1e6 / count, changed * 1e6 / count,
+                     grown * 1e6 / 100))
+    report('null backend pipeline', rows,
+           ('rows', 'build us/row', 'update us/row', 'append us/row'))
+
+
+if __name__ == '__main__':
+    main()
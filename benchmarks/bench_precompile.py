@@ -0,0 +1,66 @@
+"""
+Starting from a compiled frame and stylesheet.
+
+Compares loading the xml and css, parsing them and matching every frame,
+as sterling.app.run does, with loading the file written by
+sterling.precompile.
+"""
+
+import os
+import tempfile
+
+from common import best_of, make_css, report
+
+from sterling import frame, precompile
+from sterling.csslavie import CssParser
+from sterling.frame import Frame
+
+
+class Box(Frame):
+    def make_widget(self, data, parent=None):
+        pass
+
+
+class Label(Frame):
+    def make_widget(self, data, parent=None):
+        pass
+
+
+def make_files(rows, rules):
+    directory = tempfile.mkdtemp()
+    xml = os.path.join(directory, 'bench.xml')
+    with open(xml, 'w') as fhl:
+        fhl.write('<box ctx="items">\n')
+        for n in range(rows):
+            fhl.write('  <box class="c%d"><label class="c%d" text="title" />'
+                      '<label text="detail" /></box>\n' % (n, n + 1))
+        fhl.write('</box>\n')
+    css = os.path.join(directory, 'bench.css')
+    with open(css, 'w') as fhl:
+        fhl.write(make_css(rules))
+    return directory, xml, css
+
+
+def main():
+    results = []
+    for rows, rules in ((100, 100), (1000, 1000), (5000, 1000)):
+        directory, xml, css = make_files(rows, rules)
+        compiled = os.path.join(directory, 'bench.sterling')
+        precompile.main([xml, css, '-o', compiled])
+
+        def runtime():
+            sheet = CssParser(css)
+            sheet.attach_all(frame.from_file(xml, cached=False))
+        parsed = best_of(runtime)
+        loaded = best_of(lambda: precompile.load(compiled))
+        results.append((rows, rules, parsed * 1e3, loaded * 1e3,
+                        parsed / loaded, os.path.getsize(compiled) / 1024.0))
+        for name in os.listdir(directory):
+            os.unlink(os.path.join(directory, name))
+        os.rmdir(directory)
+    report('startup', results,
+           ('rows', 'rules', 'parse ms', 'compiled ms', 'speedup', 'file KB'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Repainting widgets after stylesheet changes.
+
+Builds a window with a button for each row of a list model on the null
+backend, then reloads the stylesheet several times between two main loop
+iterations, as a theme editor saving in quick succession would. Without a
+loop hook every change repaints its widget straight away; with one the
+scheduler repaints each widget once per flush.
+"""
+
+import time
+import xml.etree.ElementTree as ET
+
+from common import report
+
+from sterling import backends, frame, widget
+from sterling.backends import null
+from sterling.csslavie.parse import StyleSheet
+from sterling.model import Model, ListModel
+from sterling.scheduler import scheduler
+
+FRAME = '<window ctx="items"><button text="title" /></window>'
+RELOADS = 10
+
+
+class Item(Model):
+    def __init__(self, n):
+        super(Item, self).__init__()
+        self.title = 'item %d' % n
+
+
+class Items(Model):
+    def __init__(self, count):
+        super(Items, self).__init__()
+        self.items = ListModel(Item(n) for n in range(count))
+
+
+def theme(n):
+    return ('button { disabled: %s; }\nwindow { horizontal: %s; }\n'
+            % (['false', 'true'][n % 2], ['true', 'false'][n % 2]))
+
+
+def main():
+    toolkit = backends.use(null.Backend(record=False))
+    rows = []
+    for count in (100, 1000, 10000):
+        for (name, hook) in (('immediate', None), ('batched', toolkit.schedule)):
+            fr = frame._from_xml(ET.fromstring(FRAME))
+            css = StyleSheet(theme(1))
+            css.attach_all(fr)
+            win = fr.widget(Items(count))
+            scheduler.hook = hook
+            (changes, repaints) = (scheduler.style_changes, scheduler.repaints)
+            start = time.time()
+            for n in range(RELOADS):
+                css.reload(theme(n))
+            toolkit.loop.iterate()
+            taken = time.time() - start
+            scheduler.hook = None
+            rows.append((count, name, scheduler.style_changes - changes,
+                         scheduler.repaints - repaints, taken * 1e3))
+    report('%d stylesheet reloads per loop iteration' % RELOADS, rows,
+           ('buttons', 'repaint', 'changes', 'repaints', 'ms'))
+
+
+if __name__ == '__main__':
+    main()
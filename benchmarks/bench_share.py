@@ -0,0 +1,49 @@
+"""
+Style sharing between sibling objects with equal Names.
+
+Attaches a list frame with many identical rows, with and without the
+StyleSheet's shared style cache.
+"""
+
+from common import best_of, make_css, report
+
+from sterling.csslavie import PropertyObject
+from sterling.csslavie.parse import StyleSheet
+
+
+class Window(PropertyObject):
+    pass
+
+
+class Row(PropertyObject):
+    pass
+
+
+def make_tree(rows):
+    root = Window(name='window', classes=['c1'])
+    root.children = [Row(name='row', classes=['c2', 'c3'])
+                     for _ in range(rows)]
+    return root
+
+
+def main():
+    sheet = StyleSheet(make_css(1000) + '\nwindow row.c2 { height: 10; }\n')
+    results = []
+    for rows in (100, 1000, 10000):
+        times = []
+        for share in (False, True):
+            sheet.share_styles = share
+            tree = make_tree(rows)
+
+            def attach():
+                sheet._shared.clear()
+                sheet.attach_all(tree)
+            times.append(best_of(attach))
+        results.append((rows, times[0] * 1e6 / rows, times[1] * 1e6 / rows,
+                        times[0] / times[1]))
+    report('attach_all cost per row (1000 rules)', results,
+           ('rows', 'unshared us', 'shared us', 'speedup'))
+
+
+if __name__ == '__main__':
+    main()
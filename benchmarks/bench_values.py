@@ -0,0 +1,88 @@
+"""
+Css value conversion.
+
+Converts every declaration value of a generated theme, where lengths,
+colours and icons repeat as they do in real themes, with the old filter
+loop (numbers and booleans only), with the typed filters but no memo, and
+with the memoized filters as StyleSheet uses them.
+"""
+
+import random
+
+from common import best_of, report
+
+from sterling.csslavie.parse import CssValueFilters, GLOBAL_FILTERS
+
+
+class FilterRejection(ValueError):
+    pass
+
+
+def legacy_number_filter(value):
+    try:
+        if '.' in value:
+            return float(value)
+        else:
+            return int(value)
+    except ValueError:
+        raise FilterRejection("Not a Number")
+
+
+def legacy_bool_filter(value):
+    if value.lower() in {'true', 'false'}:
+        return value.lower() == 'true'
+    else:
+        raise FilterRejection("Not a Boolean")
+
+
+class LegacyFilters(list):
+    """The filter loop before values were typed and memoized"""
+    def __call__(self, value):
+        for fil in self:
+            try:
+                return fil(value)
+            except FilterRejection:
+                pass
+        return value
+
+
+def make_theme(count, seed=0):
+    """Returns the values of count declarations of a plausible theme"""
+    rnd = random.Random(seed)
+    palette = ['#%06x' % rnd.randrange(1 << 24) for _ in range(24)]
+    palette += ['white', 'black', 'transparent', 'rgba(0, 0, 0, 0.5)']
+    icons = ['url("icons/%d.png")' % n for n in range(20)]
+    kinds = [
+        lambda: '%dpx' % rnd.choice(range(0, 48, 2)),
+        lambda: '%.1fem' % rnd.choice([0.5, 1, 1.2, 1.5, 2]),
+        lambda: rnd.choice(palette),
+        lambda: rnd.choice(icons),
+        lambda: rnd.choice(['true', 'false']),
+        lambda: str(rnd.randrange(10)),
+        lambda: rnd.choice(['center', 'left', 'bold', 'none']),
+    ]
+    return [rnd.choice(kinds)() for _ in range(count)]
+
+
+def main():
+    values = make_theme(20000)
+    legacy = LegacyFilters([legacy_number_filter, legacy_bool_filter])
+    unmemoized = CssValueFilters(*GLOBAL_FILTERS)
+    unmemoized.memo_size = 0
+
+    def convert(filters):
+        for value in values:
+            filters(value)
+
+    rows = []
+    for name, make in (('legacy', lambda: legacy),
+                       ('typed', lambda: unmemoized),
+                       ('memoized', lambda: CssValueFilters(*GLOBAL_FILTERS))):
+        taken = best_of(lambda: convert(make()), repeat=5)
+        rows.append((name, len(values) / taken))
+    report('values converted per second (%d declarations, %d distinct)'
+           % (len(values), len(set(values))), rows, ('filters', 'values/s'))
+
+
+if __name__ == '__main__':
+    main()
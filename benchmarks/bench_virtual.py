@@ -0,0 +1,39 @@
+"""
+Opening and scrolling virtual sequences.
+
+Builds VirtualRows over sequences of growing length, with stand-in rows,
+and scrolls through the first few hundred elements. Both should take the
+same time however long the sequence is.
+"""
+
+from common import best_of, report
+
+from sterling.virtual import VirtualRows
+
+
+class Row(object):
+    def __init__(self, datum):
+        self.datum = datum
+
+    def bind(self, datum):
+        self.datum = datum
+        return self
+
+
+def main():
+    results = []
+    for count in (50, 10000, 1000000):
+        data = range(count)
+        opened = best_of(lambda: VirtualRows(data, Row, Row.bind))
+
+        def scroll():
+            virtual = VirtualRows(data, Row, Row.bind)
+            for first in range(0, 300, 7):
+                virtual.scroll_to(first)
+        results.append((count, opened * 1e6, best_of(scroll) * 1e6))
+    report('virtual sequences (size 50, overscan 10)', results,
+           ('elements', 'open us', 'scroll us'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Shared helpers for the benchmark scripts in this directory.
+
+Every benchmark is a plain script, run from the repository root::
+
+ python benchmarks/bench_attach.py
+"""
+
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+TYPES = ['window', 'box', 'button', 'label', 'entry', 'list', 'row', 'icon']
+
+
+def best_of(func, repeat=3):
+    """Returns the fastest wall clock time of `repeat` calls to func"""
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        func()
+        taken = time.time() - start
+        if best is None or taken < best:
+            best = taken
+    return best
+
+
+def make_css(rules, seed=0):
+    """Returns css content with the given number of generated rules"""
+    rnd = random.Random(seed)
+    lines = []
+    for n in range(rules):
+        kind = rnd.random()
+        if kind < 0.3:
+            sel = '%s.c%d' % (rnd.choice(TYPES), rnd.randrange(rules))
+        elif kind < 0.6:
+            sel = '.c%d' % rnd.randrange(rules)
+        elif kind < 0.8:
+            sel = '#%s' % rnd.choice(TYPES)
+        else:
+            sel = '%s .c%d %s' % (rnd.choice(TYPES), rnd.randrange(rules),
+                                  rnd.choice(TYPES))
+        lines.append('%s {\n  width: %d;\n  visible: true;\n}\n' % (sel, n))
+    return '\n'.join(lines)
+
+
+def report(title, rows, header):
+    """Prints a simple aligned table of benchmark results"""
+    print(title)
+    print('  '.join('%14s' % h for h in header))
+    for row in rows:
+        print('  '.join('%14s' % (('%.4g' % c) if isinstance(c, float) else c)
+                        for c in row))
+    print('')
@@ -14,9 +14,11 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>
 
-from sterling import frame
+from sterling import frame, backends
 from .csslavie import CssParser
-from efl import elementary as elm
+from .csslavie.watch import FileWatcher
+from .scheduler import scheduler
+from . import precompile
 
 # Importing the module has the effect of declaring the appropriate Frame
 # classes, which are picked up by the frame module; no additional code is
@@ -24,14 +26,47 @@ from efl import elementary as elm
 from sterling import widget
 
 
-def run(model, framespec=None, stylesheet=None):
+def run(model, framespec=None, stylesheet=None, watch=False, backend=None,
+        compiled=None):
+    """Show the user interface for model until the main loop exits.
+
+    If `watch` is true, the stylesheet is reloaded whenever its file
+    changes, and the new values are applied to the running interface.
+    `backend` is the toolkit to draw with, see `sterling.backends`.
+    `compiled` is a file made by `sterling.precompile`, used instead of
+    the frame and stylesheet files. Watching it needs the stylesheet file,
+    which is kept in the compiled file unless it was saved without one.
+    """
     def default_filename(obj, ext):
         return type(obj).__name__.lower() + '.' + ext
 
-    elm.init()
-    my_frame = frame.from_file(framespec or default_filename(model, 'xml'))
-    css = CssParser(stylesheet or default_filename(model, 'css'))
-    css.attach(my_frame)
-    w = my_frame.widget(model)
-    elm.run()
-    elm.shutdown()
+    toolkit = backends.use(backend) if backend else backends.get()
+    toolkit.init()
+    # The scheduler outlives this toolkit, so it gets its old hook back
+    previous, scheduler.hook = scheduler.hook, toolkit.schedule
+    try:
+        if compiled:
+            my_frame, css, compiled_css = precompile.load(compiled)
+            stylesheet = stylesheet or compiled_css
+            if watch and not stylesheet:
+                raise ValueError("'%s' was compiled without its stylesheet "
+                                 "file, give the stylesheet to watch"
+                                 % compiled)
+        else:
+            my_frame = frame.from_file(framespec or
+                                       default_filename(model, 'xml'))
+            stylesheet = stylesheet or default_filename(model, 'css')
+            css = CssParser(stylesheet)
+            css.attach_all(my_frame)
+        if watch:
+            watcher = FileWatcher(css, stylesheet)
+
+            def poll():
+                watcher.poll()
+                toolkit.schedule(poll, 0.5)
+            toolkit.schedule(poll, 0.5)
+        w = my_frame.widget(model)
+        toolkit.run()
+    finally:
+        scheduler.hook = previous
+        toolkit.shutdown()
@@ -0,0 +1,93 @@
+#
+# Copyright 2014 Ian Denhardt <ian@zenhack.net>
+# Copyright      Martin Owens <doctormo@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>
+"""
+The toolkits widgets are drawn with.
+
+Widgets never import a toolkit themselves; they ask the current backend
+for the toolkit objects they wrap. A backend creates objects for windows,
+boxes and buttons which follow the EFL names for the few methods sterling
+uses (show, delete, pack_end, pack_before, unpack, ...), and runs the main
+loop. `efl` draws with Enlightenment; `null` keeps the widget tree in
+memory and records what was done to it, for tests and benchmarks on
+machines without a display.
+
+The backend is picked with `use`, by default the one named by the
+STERLING_BACKEND environment variable, or efl.
+"""
+
+import os
+import importlib
+from abc import ABCMeta, abstractmethod
+
+# Backend names and the modules defining their Backend class
+BACKENDS = {
+    'efl': 'sterling.backends.efl',
+    'null': 'sterling.backends.null',
+}
+
+_current = None
+
+
+class Backend(object):
+    """The interface every backend implements."""
+    __metaclass__ = ABCMeta
+
+    def init(self):
+        """Prepare the toolkit; called before any object is created."""
+
+    def shutdown(self):
+        """Release the toolkit once the main loop has exited."""
+
+    @abstractmethod
+    def run(self):
+        """Run the main loop until the application quits."""
+
+    @abstractmethod
+    def schedule(self, callback, delay):
+        """Call `callback` once from the main loop, at least `delay`
+        seconds from now. This is the hook the update scheduler uses."""
+
+    @abstractmethod
+    def window(self, name, title):
+        """Return a new top level window."""
+
+    @abstractmethod
+    def box(self, parent):
+        """Return a new box packing its children in a row or column."""
+
+    @abstractmethod
+    def button(self, parent):
+        """Return a new button."""
+
+
+def use(backend):
+    """Make `backend`, a Backend or the name of one, the current backend
+    and return it."""
+    global _current
+    if isinstance(backend, basestring):
+        if backend not in BACKENDS:
+            raise ValueError('Unknown backend %r' % backend)
+        backend = importlib.import_module(BACKENDS[backend]).Backend()
+    _current = backend
+    return backend
+
+
+def get():
+    """Return the current backend, loading the default one if none is."""
+    if _current is None:
+        return use(os.environ.get('STERLING_BACKEND', 'efl'))
+    return _current
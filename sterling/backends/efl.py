@@ -0,0 +1,51 @@
+#
+# Copyright 2014 Ian Denhardt <ian@zenhack.net>
+# Copyright      Martin Owens <doctormo@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>
+"""
+The Enlightenment (EFL) backend.
+"""
+
+from efl import elementary as elm
+from efl import ecore
+from efl.elementary import window, box, button
+
+from sterling import backends
+
+
+class Backend(backends.Backend):
+    def init(self):
+        elm.init()
+
+    def shutdown(self):
+        elm.shutdown()
+
+    def run(self):
+        elm.run()
+
+    def schedule(self, callback, delay):
+        if delay:
+            ecore.Timer(delay, lambda: callback() and False)
+        else:
+            ecore.Job(callback)
+
+    def window(self, name, title):
+        return window.StandardWindow(name, title)
+
+    def box(self, parent):
+        return box.Box(parent)
+
+    def button(self, parent):
+        return button.Button(parent)
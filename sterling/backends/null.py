@@ -0,0 +1,137 @@
+#
+# Copyright 2014 Ian Denhardt <ian@zenhack.net>
+# Copyright      Martin Owens <doctormo@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>
+"""
+A backend keeping the widget tree in memory, for tests and benchmarks.
+
+Every object records its children, its properties and the callbacks
+added to it, and the backend records each operation in `ops`. The main
+loop is a `ManualLoop` that `run` drives until nothing is left to do.
+"""
+
+from sterling import backends
+from sterling.scheduler import ManualLoop
+
+
+class Object(object):
+    """A toolkit object, standing in for an EFL one."""
+
+    def __init__(self, backend, kind, parent):
+        self.backend = backend
+        self.kind = kind
+        self.parent = parent
+        self.packed = False
+        self.children = []
+        self.callbacks = {}
+        self.props = {}
+        self.visible = False
+        self.deleted = False
+        backend.record('new', self, kind)
+
+    def __repr__(self):
+        return '<%s %x>' % (self.kind, id(self))
+
+    def __getattr__(self, name):
+        # callback_<event>_add, as EFL objects have for each event
+        if name.startswith('callback_') and name.endswith('_add'):
+            return lambda func: self.callback_add(name[9:-4], func)
+        raise AttributeError(name)
+
+    def callback_add(self, event, func):
+        self.callbacks.setdefault(event, []).append(func)
+
+    def emit(self, event):
+        """Call the callbacks of `event`, as the toolkit would."""
+        for func in self.callbacks.get(event, ()):
+            func(self)
+
+    @property
+    def text(self):
+        return self.props.get('text')
+
+    @text.setter
+    def text(self, value):
+        self.props['text'] = value
+        self.backend.record('text', self, value)
+
+    def horizontal_set(self, value):
+        self.props['horizontal'] = value
+        self.backend.record('horizontal', self, value)
+
+    def disabled_set(self, value):
+        self.props['disabled'] = value
+        self.backend.record('disabled', self, value)
+
+    def show(self):
+        self.visible = True
+
+    def delete(self):
+        if self.packed:
+            self.parent.unpack(self)
+        self.deleted = True
+        self.backend.record('delete', self)
+
+    def resize_object_add(self, child):
+        self.pack_end(child)
+
+    def pack_end(self, child):
+        self.children.append(child)
+        child.parent, child.packed = self, True
+        self.backend.record('pack', self, child)
+
+    def pack_before(self, child, before):
+        self.children.insert(self.children.index(before), child)
+        child.parent, child.packed = self, True
+        self.backend.record('pack', self, child)
+
+    def unpack(self, child):
+        self.children.remove(child)
+        child.packed = False
+        self.backend.record('unpack', self, child)
+
+
+class Backend(backends.Backend):
+    """Keeps every window in `windows`. Set `record` to False to skip
+    recording operations."""
+
+    def __init__(self, record=True):
+        self.loop = ManualLoop()
+        self.windows = []
+        self.ops = []
+        if not record:
+            self.record = lambda *op: None
+
+    def record(self, *op):
+        self.ops.append(op)
+
+    def run(self):
+        while self.loop.iterate():
+            pass
+
+    def schedule(self, callback, delay):
+        self.loop(callback, delay)
+
+    def window(self, name, title):
+        win = Object(self, 'window', None)
+        win.props['title'] = title
+        self.windows.append(win)
+        return win
+
+    def box(self, parent):
+        return Object(self, 'box', parent)
+
+    def button(self, parent):
+        return Object(self, 'button', parent)
@@ -53,6 +53,7 @@ When the value will go back to::
 __version__ = "0.4"
 __pkgname__ = "csslavie"
 
-from .parse import CssParser
+from .parse import CssParser, CssSyntaxError
 from .objects import PropertyObject
+from .values import Length, Color, Url
 
@@ -85,6 +85,137 @@ class DefaultOrderedDict(OrderedDict):
         return None
 
 
+class Layers(object):
+    """Named layers of property dictionaries, in order from the bottom up.
+
+    The dictionaries are never changed once stored, so one dictionary (a
+    stylesheet's style, say) can be shared by the layers of many objects;
+    updating a layer replaces its dictionary with an updated copy.
+
+    Once a second layer is added, the position of the top most layer having
+    each key is kept in `winners` and updated for just the keys a change
+    touches, so looking a key up never scans the layers.
+    """
+    __slots__ = ('names', 'dicts', 'winners')
+
+    def __init__(self):
+        self.names = ()
+        self.dicts = ()
+        self.winners = None
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def __len__(self):
+        return len(self.names)
+
+    def __repr__(self):
+        return 'Layers(%r)' % (zip(self.names, self.dicts),)
+
+    def get(self, name):
+        if name in self.names:
+            return self.dicts[self.names.index(name)]
+        return {}
+
+    def lookup(self, key):
+        """Returns the value of key in the top most layer having it, raises
+        KeyError if no layer has it."""
+        if self.winners is not None:
+            return self.dicts[self.winners[key]][key]
+        if self.dicts:
+            return self.dicts[0][key]
+        raise KeyError(key)
+
+    def update(self, name, d, shared=False):
+        """Update the named layer with d, adding the layer on top if it's new.
+
+        shared - d may be kept as the layer itself instead of a copy of it,
+                 the caller promises never to change it.
+        """
+        if name in self.names:
+            pos = self.names.index(name)
+            layer = dict(self.dicts[pos])
+            layer.update(d)
+            self._replace(pos, layer)
+            if self.winners is not None:
+                winners = self.winners
+                for key in d:
+                    if winners.get(key, -1) < pos:
+                        winners[key] = pos
+            return
+
+        pos = len(self.names)
+        self.names += (name,)
+        self.dicts += (d if shared else dict(d),)
+        if self.winners is None and pos:
+            self.winners = {}
+            for (n, layer) in enumerate(self.dicts[:-1]):
+                self.winners.update(dict.fromkeys(layer, n))
+        if self.winners is not None:
+            self.winners.update(dict.fromkeys(d, pos))
+
+    def _replace(self, pos, layer):
+        self.dicts = self.dicts[:pos] + (layer,) + self.dicts[pos+1:]
+
+    def pop(self, name):
+        """Remove the named layer and return its dictionary"""
+        pos = self.names.index(name)
+        layer = self.dicts[pos]
+        self.names = self.names[:pos] + self.names[pos+1:]
+        self.dicts = self.dicts[:pos] + self.dicts[pos+1:]
+        if self.winners is not None:
+            self._lost(pos, layer)
+            if pos < len(self.names):
+                # Layers above the removed one move down a place.
+                winners = self.winners
+                for (key, won) in winners.items():
+                    if won > pos:
+                        winners[key] = won - 1
+        return layer
+
+    def discard(self, name, keys):
+        """Remove keys from the named layer, returns the keys removed"""
+        old = self.get(name)
+        removed = [key for key in keys if key in old]
+        if removed:
+            pos = self.names.index(name)
+            layer = dict(old)
+            for key in removed:
+                del layer[key]
+            self._replace(pos, layer)
+            if self.winners is not None:
+                self._lost(pos, removed)
+        return removed
+
+    def _lost(self, pos, keys):
+        """Find new winners for the keys the layer at pos no longer has"""
+        winners = self.winners
+        for key in keys:
+            if winners.get(key) != pos:
+                continue
+            for won in xrange(pos - 1, -1, -1):
+                if key in self.dicts[won]:
+                    winners[key] = won
+                    break
+            else:
+                del winners[key]
+
+    def super_keys(self):
+        if self.winners is not None:
+            return set(self.winners)
+        return set(self.dicts[0]) if self.dicts else set()
+
+    def super_gets(self, keys):
+        for key in keys:
+            yield (key, self.super_get(key))
+
+    def super_get(self, key):
+        try:
+            return self.lookup(key)
+        except KeyError:
+            return None
+
+
 class Event(set):
     def handle(self, handler):
         self.add(handler)
@@ -98,7 +229,8 @@ class Event(set):
         return self
 
     def fire(self, *args, **kargs):
-        for handler in self:
+        # Handlers may unhandle themselves as they're called
+        for handler in list(self):
             handler(*args, **kargs)
 
     __iadd__ = handle
@@ -0,0 +1,61 @@
+#
+# Copyright 2012-2014 Martin Owens <doctormo@gmail.com>
+# Copyright      2014 Ian Denhardt <ian@zenhack.net>
+#
+# This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>
+#
+"""
+A small on-disk cache of pickled objects, used to keep compiled stylesheets
+between runs so they don't have to be parsed again.
+"""
+
+import os
+import logging
+import cPickle as pickle
+
+log = logging.getLogger(__name__)
+
+
+def cached(cache_dir, key, build):
+    """Returns the object stored under key in cache_dir, or builds it.
+
+    build  - callable returning the object when it is not in the cache, the
+             result is then stored under key for the next call.
+
+    Unreadable cache entries are logged and rebuilt, and failing to write
+    the cache is never an error; it just means building again next time.
+    """
+    path = os.path.join(cache_dir, key + '.pickle')
+    if os.path.exists(path):
+        try:
+            with open(path, 'rb') as fhl:
+                return pickle.load(fhl)
+        except Exception, error:
+            log.warning("Ignoring bad cache file '%s': %s" % (path, error))
+
+    obj = build()
+    try:
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        # Only writing needs tempfile, which is slow to import
+        import tempfile
+        # Write to a temporary file first so another process never reads
+        # a half written cache entry.
+        (fd, tmp) = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as fhl:
+            pickle.dump(obj, fhl, pickle.HIGHEST_PROTOCOL)
+        os.rename(tmp, path)
+    except (IOError, OSError), error:
+        log.warning("Can't write cache file '%s': %s" % (path, error))
+    return obj
@@ -21,59 +21,140 @@ The idea here is to provide a machanism for getting attributes at the right time
 Should provide stateful attribute access and some signal support for changes.
 """
 
-from .base import DefaultOrderedDict, Event
-from collections import defaultdict
+from .base import Layers, Event
+
+# Every object's set of user attribute names is interned here, so objects
+# which had the same attributes set share one frozenset between them.
+_user_keys = {}
+_added_keys = {}
+
+
+def _intern(keys):
+    return _user_keys.setdefault(keys, keys)
+
+
+def _with_key(keys, name):
+    """Returns the interned set of keys with name added"""
+    try:
+        return _added_keys[(keys, name)]
+    except KeyError:
+        new = _added_keys[(keys, name)] = _intern(keys | frozenset([name]))
+        return new
+
 
 class PropertyObject(object):
     """Property objects control system of layered property dictionaries,
        attributes returned are from the top most stack with that item key
 
-    ! Keeping the user attributes ahead of the pack is trouble. Is this useful?
-
+    Attributes set on the object directly (user attributes) are kept ahead
+    of every layer. The layers are the record of the layered values, and
+    the winning value of each key not set by the user is copied into
+    __dict__ whenever its layers change, so that reading it is an ordinary
+    attribute lookup. The layers themselves and the watchers are only
+    allocated once they are needed.
     """
-    def __new__(cls, *p, **k):
-        inst = object.__new__(cls)
-        inst._attrs = DefaultOrderedDict(dict)
-        inst._watch = defaultdict(Event)
-        return inst
+    # Set by StyleSheet.attach to the stylesheet and what it matched.
+    _css = None
+    _layers = None
+    _watch = None
+    _user = frozenset()
 
     def __init__(self, name=None, classes=None):
         self.name = name
         self.classes = classes
 
     def __setattr__(self, name, value):
-        if name[0] != '_':
-            self._attrs['user'][name] = value
+        if name[0] == '_':
+            object.__setattr__(self, name, value)
+            return
+        old = self._values([name])
+        if name not in self._user:
+            object.__setattr__(self, '_user', _with_key(self._user, name))
         object.__setattr__(self, name, value)
+        if self._css is not None:
+            self._css[0].changed(self, name)
+        self._changed(old)
 
     def __delattr__(self, name):
-        if name[0] != '_' and name in self._attrs['user']:
-            self._attrs['user'].pop(name)
-        self.refresh([name])
-
-    def add_to(self, d, name='base'):
-        reorder = name not in self._attrs
-
-        self._attrs[name].update(d)
-        if reorder:
-            self._attrs.sort_to_end('user')
-
-        self.__dict__.update(d)
-
-        if 'user' in self._attrs:
-            self.__dict__.update(self._attrs['user'])
-
-    def remove(self, name):
-        old = self._attrs.pop(name)
-        self.refresh(old.keys())
+        if name[0] != '_' and name in self._user:
+            old = self._values([name])
+            self._user = _intern(self._user - frozenset([name]))
+            object.__delattr__(self, name)
+            self.refresh([name])
+            self._changed(old)
+        elif name[0] == '_':
+            object.__delattr__(self, name)
+
+    def add_to(self, d, name='base', shared=False):
+        """Update the named layer with the properties in d.
+
+        shared - d is kept as the layer instead of a copy, which the caller
+                 must then never change.
+        """
+        if self._layers is None:
+            self._layers = Layers()
+        old = self._values(d)
+        self._layers.update(name, d, shared)
+        self.refresh(d)
+        self._changed(old)
+
+    def remove(self, name, keys=None):
+        """Remove the named layer, or only the given keys from it"""
+        old = self._values(self._layers.get(name) if keys is None else keys)
+        if keys is None:
+            keys = list(self._layers.pop(name))
+        else:
+            keys = self._layers.discard(name, keys)
+        self.refresh(keys)
+        self._changed(old)
 
     def refresh(self, keys=None):
-        keys = keys or self._attrs.super_keys()
-        self.__dict__.update(self._attrs.super_gets(keys))
+        """Copy the winning layered values of keys (or of every layered key)
+        not set by the user into __dict__, where they are read from."""
+        if self._layers is None:
+            return
+        (user, layers, values) = (self._user, self._layers, self.__dict__)
+        if keys is None:
+            keys = layers.super_keys()
+        for key in keys:
+            if key in user:
+                continue
+            try:
+                values[key] = layers.lookup(key)
+            except KeyError:
+                values.pop(key, None)
 
     def watch(self, callback, name, value=None, callback_off=None):
         """A single watcher for attribute changes... can also detect on/off switching"""
+        if self._watch is None:
+            self._watch = {}
+        if name not in self._watch:
+            self._watch[name] = Event()
         self._watch[name] += callback
 
-
-
+    def unwatch(self, callback, name):
+        """Stop calling callback when the named attribute changes"""
+        if self._watch and name in self._watch:
+            self._watch[name].discard(callback)
+
+    def _values(self, keys):
+        """Returns the values of the watched keys among keys, to be given
+        to _changed once they may have changed"""
+        if not self._watch:
+            return None
+        return dict((key, getattr(self, key, None)) for key in keys
+                    if key in self._watch)
+
+    def _changed(self, old):
+        """Fire the watchers of the keys in old whose values changed"""
+        if old:
+            self.notify([key for (key, value) in old.iteritems()
+                         if getattr(self, key, None) != value])
+
+    def notify(self, keys):
+        """Fire the watchers of each of keys with (self, key, value)"""
+        if not self._watch:
+            return
+        for key in keys:
+            if key in self._watch:
+                self._watch[key].fire(self, key, getattr(self, key, None))
@@ -22,10 +22,17 @@ Take in CSS text and produce a property map to be applied to items.
 import re
 import os
 import sys
+import hashlib
 import logging
+import weakref
+
+from .cache import cached
+from .values import length_filter, color_filter, url_filter
 
 from collections import defaultdict, OrderedDict
 
+log = logging.getLogger(__name__)
+
 
 class FilterRejection(ValueError):
     """Raised when a filter fails to recognise the value"""
@@ -36,10 +43,19 @@ class CssValueFilters(list):
     Filters allow values to be pre-packaged into the right format. This
     includes numbers, lengths (units) colours, urls, animations and so forth.
     Objectifying the value before it gets passed to the target object.
+
+    A filter rejects a value it doesn't recognise by returning
+    NotImplemented, or by raising FilterRejection. Each distinct value is
+    only filtered once and the result is shared by every later use, so
+    filters must return immutable values.
     """
     dd_f = "CSS Filter '%s' died with the error '%s', removed from filter list"
 
+    # The most distinct values remembered
+    memo_size = 10000
+
     def __init__(self, *filters):
+        self._memo = {}
         self.add(filters)
 
     def add(self, filters):
@@ -47,123 +63,246 @@ class CssValueFilters(list):
             self.append(fil)
 
     def __call__(self, value):
+        try:
+            return self._memo[value]
+        except KeyError:
+            pass
+        if type(value) is str:
+            value = intern(value)
+        result = self._filter(value)
+        if len(self._memo) < self.memo_size:
+            self._memo[value] = result
+        return result
+
+    def _filter(self, value):
         to_remove = []
         for fil in self:
             try:
-                return fil(value)
+                result = fil(value)
+                if result is not NotImplemented:
+                    return result
             except FilterRejection:
                 pass
             except Exception, error:
                 to_remove.append(fil)
                 name = getattr(fil, '__name__', str(fil))
-                logging.error(self.dd_f % (name, str(error)))
+                log.error(self.dd_f % (name, str(error)))
         for fil in to_remove:
             self.remove(fil)
         return value
 
 
+def _forgetting(name):
+    """Return the list method `name`, made to forget the filtered values
+    first, as the filters they came from are changing."""
+    method = getattr(list, name)
+
+    def forget(self, *args, **kwargs):
+        self._memo.clear()
+        return method(self, *args, **kwargs)
+    forget.__name__ = name
+    return forget
+
+for _name in ('__setitem__', '__delitem__', '__setslice__', '__delslice__',
+              '__iadd__', '__imul__', 'append', 'extend', 'insert', 'pop',
+              'remove', 'reverse', 'sort'):
+    setattr(CssValueFilters, _name, _forgetting(_name))
+
+
+_NUMBER = re.compile(r'[-+]?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?$')
+
 def number_filter(value):
-    try:
-        if '.' in value:
-            return float(value)
-        else:
-            return int(value)
-    except ValueError:
-        raise FilterRejection("Not a Number")
+    if _NUMBER.match(value) is None:
+        return NotImplemented
+    if '.' in value or 'e' in value or 'E' in value:
+        return float(value)
+    else:
+        return int(value)
 
 def bool_filter(value):
     if value.lower() in {'true', 'false'}:
         return value.lower() == 'true'
     else:
-        raise FilterRejection("Not a Boolean")
+        return NotImplemented
 
 GLOBAL_FILTERS = {
     number_filter,
     bool_filter,
+    length_filter,
+    color_filter,
+    url_filter,
 }
 
 
-def _block(string, f1, f2, s):
-    """Find the start and end of a block in a string"""
-    i = string.find(f1, s)
-    j = string.find(f2, i)
-    return (i, j)
+class CssSyntaxError(ValueError):
+    """Raised when the css content can not be parsed"""
+    def __init__(self, msg, content, pos):
+        self.line = content.count('\n', 0, pos) + 1
+        self.column = pos - content.rfind('\n', 0, pos)
+        ValueError.__init__(self, "%s at line %d, column %d" % (
+            msg, self.line, self.column))
 
 
-def _parse(string, sep='=', eol='\n', vtype=str, ktype=str, start=0):
-    """Parse any content between a start, end and seperator.
+(_RULE, _TEXT, _STRING, _OPEN, _CLOSE, _COLON, _SEMI, _COMMENT, _BAD) = \
+    (1, 4, 5, 6, 7, 8, 9, 10, 11)
 
-    sep   - seperator between a name and value pair
-    eol   - An end of line marker to stop the parsing.
-    start - Starting character number.
-    vtype - Type or filter for each of the values before returning.
-    ktype - Type or filter for each of the keys, if the function returns a list
-            each immutable item in the list is a key with a duplicate of the value.
+# Each alternative is one numbered group, in the order listed above. A whole
+# rule without comments, strings or slashes is matched at once (selector and
+# body in groups 2 and 3) as a fast path; anything else falls back to the
+# smaller tokens. Comments are matched before text so that '//' and '/*'
+# never start a text token.
+_TOKENS = re.compile(r"""
+    (([^{};/"']*)\{((?:\s*[-\w]+\s*:[^{};/"']*;)*(?:\s*[-\w]+\s*:[^{};/"']*)?\s*)\})
+  | ([^{}:;/"']+|/(?![/*]))
+  | ("(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')
+  | (\{) | (\}) | (:) | (;)
+  | (/\*.*?\*/|//[^\n]*)
+  | (/\*|["'])
+""", re.VERBOSE | re.DOTALL)
+
+_DECLARATIONS = re.compile(r'\s*([-\w]+)\s*:([^;]*)')
+
+_NAME_TOKENS = re.compile(r'(>)|(\s+)|([.#:]?[^\s.#:>]+|[.#:])')
 
-    Both sep and eol must be single characters - multi-character delimiters are
-    *not* supported.
-    """
-    result = []
-    while True:
-        (i, j) = _block(string, sep, eol, start)
-        if i < 0 or j < 0 or j < i:
-            break
-        name = string[start:i].strip()
-        keys = ktype(name)
-        value = vtype(string[i+1:j].strip())
-        if not isinstance(keys, list):
-            keys = [ keys ]
-        for key in keys:
-            result.append((key,value))
-        start = j+1
-    return result
 
-def _remove(string, left='"""', right='"""'):
-    """Removes comments from an input string (should be done first)."""
-    start = 0
-    while True:
-        (i, j) = _block(string, left, right, start)
-        if i < 0 or j < 0 or j < i:
-            break
-        string = string[:i] + string[j+2:]
-        start = i
-    return string
+def _intern(name):
+    """Property names are interned, as every object styled shares them"""
+    return intern(name) if type(name) is str else name
+
 
 def _parse_names(content):
+    """Split a single selector into its space joined compound selectors,
+    with a '>' entry between a direct parent and child."""
     result = []
-    # We want to make sure the direct parent/child
-    # chevron can be with or without spaces.
-    for name in content.replace('>', ' > ').split():
-        for char in '.#:':
-            name = name.replace(char, ' '+char)
-        result.append( name.strip() )
+    compound = []
+    for (chevron, space, name) in _NAME_TOKENS.findall(content):
+        if name:
+            compound.append(name)
+            continue
+        if compound:
+            result.append(' '.join(compound))
+            compound = []
+        if chevron:
+            result.append(chevron)
+    if compound:
+        result.append(' '.join(compound))
     return result
 
+
 def _parse_css(content, filters=None):
-    """Parse css formated content"""
+    """Parse css formated content in a single pass over its tokens.
+
+    Returns a list of (names, style) pairs, one for each selector in each
+    rule. Selectors sharing a rule share the same style dictionary.
+    Raises CssSyntaxError with the line and column of malformed content.
+    """
     filters = filters or CssValueFilters(*GLOBAL_FILTERS)
-    content = _remove(content, '/*', '*/')
-    content = _remove(content, '//', '\n')
-    return _parse(content, '{', '}',
-        ktype=lambda c: [ _parse_names(p) for p in c.split(',') ],
-        vtype=lambda c: dict( _parse(c,":",";", vtype=filters))
-    )
+    result = []
+    text = []
+    (style, name, pos) = (None, None, 0)
+    for match in _TOKENS.finditer(content):
+        kind = match.lastindex
+        if kind == _RULE and style is None:
+            style = dict((_intern(key), filters(value.strip())) for (key, value)
+                         in _DECLARATIONS.findall(match.group(3)))
+            for selector in (''.join(text) + match.group(2)).split(','):
+                names = _parse_names(selector)
+                if not names:
+                    raise CssSyntaxError("Missing selector", content,
+                                         match.start(3) - 1)
+                result.append((names, style))
+            (style, text) = (None, [])
+            continue
+        elif kind == _COMMENT:
+            continue
+        pos = match.start()
+        if kind == _RULE:
+            raise CssSyntaxError("Unexpected '{'", content, match.start(3) - 1)
+        if kind == _TEXT or kind == _STRING:
+            text.append(match.group(0))
+        elif kind == _COLON and (style is None or name is not None):
+            # Part of a pseudo selector, or of a value such as a url.
+            text.append(':')
+        elif kind == _COLON:
+            name = ''.join(text).strip()
+            if not name:
+                raise CssSyntaxError("Missing property name", content, pos)
+            text = []
+        elif kind == _OPEN:
+            if style is not None:
+                raise CssSyntaxError("Unexpected '{'", content, pos)
+            selectors = ''.join(text).split(',')
+            style = {}
+            for selector in selectors:
+                names = _parse_names(selector)
+                if not names:
+                    raise CssSyntaxError("Missing selector", content, pos)
+                result.append((names, style))
+            text = []
+        elif kind == _SEMI or kind == _CLOSE:
+            if style is None:
+                raise CssSyntaxError("Unexpected '%s'" % match.group(kind),
+                                     content, pos)
+            if name is not None:
+                style[_intern(name)] = filters(''.join(text).strip())
+            elif ''.join(text).strip():
+                raise CssSyntaxError("Missing ':' after property name",
+                                     content, pos)
+            (name, text) = (None, [])
+            if kind == _CLOSE:
+                style = None
+        else:
+            raise CssSyntaxError("Unterminated comment or string",
+                                 content, pos)
+    if style is not None:
+        raise CssSyntaxError("Missing '}'", content, len(content))
+    if ''.join(text).strip():
+        raise CssSyntaxError("Missing '{'", content, len(content))
+    return result
+
 
+def CssParser(filename=None, cache_dir=None):
+    """Returns a style sheet for the given filename
 
-def CssParser(filename=None):
-    """Returns a style sheet for the given filename"""
+    cache_dir - Directory to keep the compiled style sheet in, the file is
+                only parsed again when its content or the filters change.
+    """
     if filename:
         with open(filename, 'r') as fhl:
-            return StyleSheet(fhl.read())
+            content = fhl.read()
+        if cache_dir:
+            return cached(cache_dir, StyleSheet.cache_key(content),
+                          lambda: StyleSheet(content))
+        return StyleSheet(content)
     return StyleSheet()
 
 
-def get_weight(name):
-    """Returns a weight based on the name construction,
+def _pool(workers, initializer=None, initargs=()):
+    # Only parallel work needs multiprocessing, which is slow to import
+    import multiprocessing
+    return multiprocessing.Pool(workers, initializer, initargs)
+
+
+def _parse_file(job):
+    """Parses the content of one file in a worker process"""
+    (cls, content) = job
+    return _parse_css(content, filters=cls._new_filters())
+
+
+# The rules a worker process matches names against, see _attach_parallel
+_matcher = None
+
+
+def _init_matcher(rules, buckets):
+    global _matcher
+    _matcher = StyleSheet.__new__(StyleSheet)
+    (_matcher._rules, _matcher._buckets) = (rules, buckets)
+
+
+def _match_names(names):
+    """Returns the rules matching each Names in a worker process"""
+    return [_matcher._matching(item) for item in names]
 
-     ! this might be standardised somewhere, but I didn't look it up.
-    """
-    return name.count(".") + name.count("*") * 2 + name.count("#") * 4 + name.count(">") * 8
 
 class StyleSheet(object):
     """This stylesheet object allows one to 'attach' objects to css, this css
@@ -175,80 +314,542 @@ class StyleSheet(object):
 
     filters    = None
 
+    # Objects whose Names and parents' Names are equal, such as the rows of
+    # a list, share one merged style instead of each matching every rule.
+    share_styles = True
+
+    # Change this whenever the pickled form of a StyleSheet changes, so
+    # that stale compiled style sheets are never loaded from a cache.
+    cache_format = 5
+
     def __init__(self, content=None):
         self.styles = []
-        self.filters = CssValueFilters(*(self.filters or []))
-        self.filters.add(GLOBAL_FILTERS)
+        self._roots = weakref.WeakSet()
+        self._init_filters()
 
         if content:
             self.styles = _parse_css(content, filters=self.filters)
-
-        _i = defaultdict(list)
-
-        for names, style in self.styles:
-            _i['*'.join(names)].append(style)
-
-        # Weigh up the names and sort them by weight here
-        self._index = OrderedDict(sorted(_i.iteritems(), key=lambda x: get_weight(x[0])))
-
-    def attach(self, obj, parent=None):
+        self._compile()
+
+    def _compile(self):
+        """Builds the index and the compiled rules from self.styles.
+
+        Rules are put in cascade order once, here: by the specificity of
+        their selector and then by their place in the source, so that the
+        later of two equally specific rules wins.
+        """
+        # Shared styles are keyed by signatures from this sheet's table, so
+        # both go together and are dropped whenever the rules change.
+        self._shared = {}
+        self._signatures = {}
+        self._index = OrderedDict()
+        selectors = {}
+        rules = []
+        for (source, (names, style)) in enumerate(self.styles):
+            key = '*'.join(names)
+            styles = self._index.setdefault(key, [])
+            if key not in selectors:
+                selectors[key] = Selector.compile(names)
+            selector = selectors[key]
+            rules.append((selector.specificity(), source,
+                          (key, len(styles)), selector, style))
+            styles.append(style)
+        rules.sort(key=lambda rule: rule[:2])
+        # Each rule is known by its selector and which of the rules with
+        # that selector it is, so a reload can tell which rules changed.
+        self._ids = [rule[2] for rule in rules]
+        self._rules = [rule[3:] for rule in rules]
+
+        # Bucket every rule under one key of its rightmost compound selector;
+        # an object can only match a rule if it has that key in its Names.
+        # Also note every rule a key appears in, for restyling objects whose
+        # names change, and which keys are ever needed in a parent's names.
+        self._buckets = defaultdict(list)
+        self._mentions = defaultdict(set)
+        self._parent_keys = set()
+        for (pos, (selector, style)) in enumerate(self._rules):
+            self._buckets[selector.key()].append(pos)
+            for (depth, (keys, combinator)) in enumerate(selector):
+                for key in keys:
+                    self._mentions[key].add(pos)
+                if depth:
+                    self._parent_keys.update(keys)
+
+    def _init_filters(self):
+        self.filters = self._new_filters()
+
+    @classmethod
+    def _new_filters(cls):
+        filters = CssValueFilters(*(cls.filters or []))
+        filters.add(GLOBAL_FILTERS)
+        return filters
+
+    @classmethod
+    def from_files(cls, filenames, workers=1):
+        """Returns one stylesheet with the rules of every file, as if the
+        files were joined in the given order; later files win over earlier
+        ones when their rules are equally specific.
+
+        workers - Parse the files in a pool of this many processes.
+        """
+        contents = []
+        for filename in filenames:
+            with open(filename, 'r') as fhl:
+                contents.append(fhl.read())
+        sheet = cls()
+        if workers > 1 and len(contents) > 1:
+            pool = _pool(workers)
+            try:
+                parsed = pool.map(_parse_file,
+                                  [(cls, content) for content in contents])
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            parsed = [_parse_css(content, filters=sheet.filters)
+                      for content in contents]
+        for styles in parsed:
+            sheet.styles.extend(styles)
+        sheet._compile()
+        return sheet
+
+    def __getstate__(self):
+        # The filters are only needed while parsing and may not pickle, and
+        # the shared styles are keyed by signatures local to this process.
+        # Attached objects are only pickled if they are pickled with us.
+        state = self.__dict__.copy()
+        del state['filters']
+        del state['_shared']
+        del state['_signatures']
+        state['_roots'] = list(self._roots)
+        return state
+
+    def __setstate__(self, state):
+        roots = state.pop('_roots', ())
+        self.__dict__.update(state)
+        self._init_filters()
+        self._shared = {}
+        self._signatures = {}
+        self._roots = weakref.WeakSet(roots)
+
+    @classmethod
+    def cache_key(cls, content):
+        """Returns a key for content compiled by this class and its filters"""
+        filters = list(cls.filters or []) + list(GLOBAL_FILTERS)
+        names = sorted('%s.%s' % (getattr(fil, '__module__', None),
+                                  getattr(fil, '__name__', type(fil)))
+                       for fil in filters)
+        key = hashlib.sha1(content)
+        key.update('\0'.join([cls.__module__, cls.__name__,
+                              str(cls.cache_format)] + names))
+        return key.hexdigest()
+
+    def _candidates(self, names):
+        """Returns the positions of the rules which could match names, in
+        cascade order"""
+        found = set()
+        for name in names:
+            if name in self._buckets:
+                found.update(self._buckets[name])
+        return sorted(found)
+
+    def _names(self, obj, parent):
         names = Names()
         names.add( getattr(type(obj), self._attr_name, None) )
         names.add( getattr(obj, self._attr_oid, None), '#' )
         names.set_parent(parent)
         for c in getattr(obj, self._attr_cls, []) or []:
             names.add(c, '.')
-        for (ns, style) in self._index.items():
-            if names.match(ns):
-                for s in style:
-                    obj.add_to(s)
-        # XXX Attach signal here for state updates
         return names
 
-    def attach_all(self, obj, parent=None):
-        children = getattr(obj, self._attr_children, [])
-        new_parent = self.attach(obj, parent=parent)
-        for child in children:
-            self.attach_all(child, parent=new_parent)
-        return new_parent
+    def attach(self, obj, parent=None):
+        self._roots.add(obj)
+        return self._attach(obj, parent)
+
+    def _attach(self, obj, parent):
+        names = self._names(obj, parent)
+        (matched, style) = self._match(names)
+        self._apply(obj, names, matched, style)
+        return names
+
+    def _match(self, names, old=(), affected=None):
+        """Returns the positions of the rules matching names and their merged
+        style. Given the `old` matched positions, only the `affected` rules
+        are tested again."""
+        if self.share_styles:
+            signature = names.signature(self._signatures)
+            if signature in self._shared:
+                return self._shared[signature]
+        if affected is None:
+            matched = self._matching(names)
+        else:
+            matched = frozenset(
+                [pos for pos in old if pos not in affected] +
+                [pos for pos in affected if self._rules[pos][0].match(names)])
+        style = self._merged(matched)
+        if self.share_styles:
+            self._shared[signature] = (matched, style)
+        return (matched, style)
+
+    def _matching(self, names):
+        """Returns the positions of every rule matching names"""
+        return frozenset(pos for pos in self._candidates(names)
+                         if self._rules[pos][0].match(names))
+
+    def _merged(self, matched):
+        """Returns the style of the matched rules, in cascade order"""
+        style = {}
+        for pos in sorted(matched):
+            style.update(self._rules[pos][1])
+        return style
+
+    def _apply(self, obj, names, matched, style):
+        """Records what matched obj and applies the style to it. Objects
+        already attached to this stylesheet get only the changed values."""
+        old = getattr(obj, '_css', None)
+        obj._css = (self, names, matched, style)
+        if old is None or old[0] is not self:
+            if style:
+                obj.add_to(style, shared=True)
+            return
+        old = old[3]
+        if old is style:
+            return
+        changed = dict((key, value) for (key, value) in style.iteritems()
+                       if key not in old or old[key] != value)
+        removed = [key for key in old if key not in style]
+        # Both fire the watchers of the keys they change
+        if changed:
+            obj.add_to(changed, shared=True)
+        if removed:
+            obj.remove('base', removed)
+
+    def changed(self, obj, attr):
+        """Called by attached objects whenever an attribute is set"""
+        if attr == self._attr_oid or attr == self._attr_cls:
+            self.restyle(obj)
+
+    def restyle(self, obj):
+        """Updates the style of an attached object after its name or classes
+        changed, and of its descendants.
+
+        Only the rules mentioning one of the names which changed are tested
+        again, and only values which changed are pushed to the objects.
+        """
+        (sheet, names, matched, style) = obj._css
+        fresh = self._names(obj, names.parent)
+        changed = names ^ fresh
+        if not changed:
+            return
+        # The names are updated in place, as the children's names point to
+        # them as their parent.
+        names.clear()
+        names.update(fresh)
+        names._signature = None
+        affected = set()
+        for key in changed:
+            affected.update(self._mentions.get(key, ()))
+        self._apply(obj, names, *self._match(names, matched, affected))
+
+        # The children's signatures depend on these names, and so do their
+        # styles when a rule needs one of the changed names in a parent.
+        deep = bool(changed & self._parent_keys)
+        stack = self._attached_children(obj)
+        while stack:
+            obj = stack.pop()
+            (sheet, names, matched, style) = obj._css
+            names._signature = None
+            names._ancestry = None
+            if deep:
+                self._apply(obj, names, *self._match(names, matched, affected))
+            stack.extend(self._attached_children(obj))
+
+    def _attached_children(self, obj):
+        return [child for child in getattr(obj, self._attr_children, None) or []
+                if getattr(child, '_css', None) and child._css[0] is self]
+
+    def attach_all(self, obj, parent=None, workers=1):
+        """Attaches obj and all of its descendants.
+
+        workers - Match the subtree of each of obj's children in a pool of
+                  this many processes. The styles are still applied here.
+        """
+        self._roots.add(obj)
+        if workers > 1:
+            return self._attach_parallel(obj, parent, workers)
+        return self._attach_all(obj, parent)
+
+    def _attach_all(self, obj, parent):
+        # A stack instead of recursion, as generated trees can be deeper
+        # than the recursion limit.
+        root = self._attach(obj, parent)
+        children = getattr(obj, self._attr_children, None) or []
+        stack = [(child, root) for child in reversed(children)]
+        while stack:
+            (item, above) = stack.pop()
+            names = self._attach(item, above)
+            children = getattr(item, self._attr_children, None) or []
+            stack.extend((child, names) for child in reversed(children))
+        return root
+
+    def _attach_parallel(self, obj, parent, workers):
+        root = self._attach(obj, parent)
+        subtrees = []
+        for child in getattr(obj, self._attr_children, None) or []:
+            found = []
+            stack = [(child, root)]
+            while stack:
+                (item, above) = stack.pop()
+                names = self._names(item, above)
+                found.append((item, names))
+                children = getattr(item, self._attr_children, None) or []
+                stack.extend((c, names) for c in reversed(children))
+            subtrees.append(found)
+
+        # Only the objects themselves stay here, each worker is sent the
+        # distinct Names of one subtree and returns what they match.
+        shared = self._shared if self.share_styles else {}
+        jobs = []
+        for found in subtrees:
+            todo = OrderedDict()
+            for (item, names) in found:
+                signature = names.signature(self._signatures)
+                if signature not in shared:
+                    todo.setdefault(signature, names)
+            jobs.append(todo)
+        pool = _pool(workers, _init_matcher, (self._rules, self._buckets))
+        try:
+            results = pool.map(_match_names, [todo.values() for todo in jobs])
+        finally:
+            pool.close()
+            pool.join()
+        matches = {}
+        for (todo, matched) in zip(jobs, results):
+            matches.update(zip(todo, matched))
+
+        for found in subtrees:
+            for (item, names) in found:
+                signature = names.signature(self._signatures)
+                if signature in shared:
+                    (matched, style) = shared[signature]
+                else:
+                    matched = matches[signature]
+                    style = self._merged(matched)
+                    if self.share_styles:
+                        shared[signature] = (matched, style)
+                self._apply(item, names, matched, style)
+        return root
+
+    def reload(self, content):
+        """Replaces the rules with those parsed from content.
+
+        Objects attached to this stylesheet are given only the values which
+        changed, and only the rules which were added, removed or changed
+        are tested against them again. Raises CssSyntaxError, leaving the
+        stylesheet as it was, if the content can't be parsed.
+        """
+        styles = _parse_css(content, filters=self.filters)
+        old_ids = self._ids
+        old_styles = dict((rid, rule[1])
+                          for (rid, rule) in zip(old_ids, self._rules))
+        self.styles = styles
+        self._compile()
+
+        positions = dict((rid, pos) for (pos, rid) in enumerate(self._ids))
+        changed = set(rid for (rid, rule) in zip(self._ids, self._rules)
+                      if old_styles.get(rid) != rule[1])
+        changed.update(rid for rid in old_styles if rid not in positions)
+        affected = set(positions[rid] for rid in changed if rid in positions)
+
+        seen = set()
+        stack = [obj for obj in self._roots if obj._css[0] is self]
+        while stack:
+            obj = stack.pop()
+            if id(obj) in seen:
+                continue
+            seen.add(id(obj))
+            (sheet, names, matched, style) = obj._css
+            matched = [positions[old_ids[pos]] for pos in matched
+                       if old_ids[pos] not in changed]
+            self._apply(obj, names, *self._match(names, matched, affected))
+            stack.extend(self._attached_children(obj))
+
+
+CHILD = '>'
+DESCENDANT = ' '
+
+
+# Enough bits that the few dozen names in a tree's parents leave most unset
+BLOOM_BITS = 256
+
+
+def _bloom(keys):
+    """Returns an int with one bit set for each of the keys. The bits
+    depend on hash(), so they are never pickled."""
+    bits = 0
+    for key in keys:
+        bits |= 1 << (hash(key) % BLOOM_BITS)
+    return bits
+
+
+class Selector(tuple):
+    """A compiled selector, matched against Names without any string work.
+
+    Holds one (keys, combinator) pair for each compound selector, starting
+    with the rightmost. keys is a frozenset of the names a Names set must
+    have, the combinator says how the compound relates to the one before
+    it (to its right), and is None for the rightmost compound.
+    """
+    # The bloom of every key needed in a parent, made on the first match
+    _ancestors = None
+
+    @classmethod
+    def compile(cls, ns):
+        """Returns a Selector for a list of names (or '*' joined string)
+        such as ['name #parent', '>', 'name #child']"""
+        if isinstance(ns, basestring):
+            ns = ns.split('*')
+        parts = []
+        combinator = None
+        for stanza in reversed(ns):
+            if stanza == CHILD:
+                combinator = CHILD
+                continue
+            parts.append((frozenset(stanza.split(' ')), combinator))
+            combinator = DESCENDANT
+        return cls(parts)
+
+    def __str__(self):
+        result = []
+        for (keys, combinator) in reversed(self):
+            result.append(' '.join(sorted(keys)))
+            if combinator == CHILD:
+                result.append(CHILD)
+        return '*'.join(result)
+
+    def key(self):
+        """Returns the key used to index this selector in a stylesheet,
+
+         ids are the most selective, followed by classes and then types.
+        """
+        keys = self[0][0]
+        for prefix in '#.':
+            found = [key for key in keys if key[0] == prefix]
+            if found:
+                return min(found)
+        return min(keys)
+
+    def specificity(self):
+        """Returns the (ids, classes, types) counts of this selector, classes
+        including pseudo classes and the universal '*' counting for none."""
+        (ids, classes, types) = (0, 0, 0)
+        for (keys, combinator) in self:
+            for key in keys:
+                if key[0] == '#':
+                    ids += 1
+                elif key[0] in '.:':
+                    classes += 1
+                elif key != '*':
+                    types += 1
+        return (ids, classes, types)
+
+    def __reduce__(self):
+        return (Selector, (tuple(self),))
+
+    def match(self, names):
+        """Returns True if the names (and their parents) match.
+
+        The parents are only walked when every key the selector needs in a
+        parent is in the bloom of the names' parents, see Names.ancestry.
+        """
+        if not self[0][0] <= names:
+            return False
+        if len(self) == 1:
+            return True
+        bloom = self._ancestors
+        if bloom is None:
+            bloom = self._ancestors = _bloom(
+                key for (keys, combinator) in self[1:] for key in keys)
+        return (not bloom & ~names.ancestry()
+                and self._match_parents(names, 1))
+
+    def _match_parents(self, names, pos):
+        if pos == len(self):
+            return True
+        (keys, combinator) = self[pos]
+        parent = names.parent
+        if combinator == CHILD:
+            return (parent is not None and keys <= parent
+                    and self._match_parents(parent, pos + 1))
+        # Indirect parent test (any parent can match the next stanza)
+        while parent is not None:
+            if keys <= parent and self._match_parents(parent, pos + 1):
+                return True
+            parent = parent.parent
+        return False
 
 
 class Names(set):
+    parent = None
+    _signature = None
+    # The table the signature was given from
+    _table = None
+    _ancestry = None
+
     def add(self, name, sep=''):
         if name != None:
             set.add(self, sep + str(name).lower())
+            self._signature = None
+
+    def signature(self, table):
+        """Returns an int which is equal for any two Names with the same
+        names whose parents have equal signatures from the same table.
+
+        table - a dict kept by the caller (a stylesheet) for as long as it
+                needs its signatures to stay comparable.
+        """
+        if self._signature is None or self._table is not table:
+            chain = []
+            names = self
+            while names is not None and (names._signature is None or
+                                         names._table is not table):
+                chain.append(names)
+                names = names.parent
+            for names in reversed(chain):
+                parent = names.parent
+                key = (frozenset(names),
+                       None if parent is None else parent._signature)
+                names._signature = table.setdefault(key, len(table))
+                names._table = table
+        return self._signature
+
+    def ancestry(self):
+        """Returns the bloom of the names of all the parents, in which a
+        name no parent has is very likely to be missing."""
+        if self._ancestry is None:
+            chain = []
+            names = self
+            while names is not None and names._ancestry is None:
+                chain.append(names)
+                names = names.parent
+            for names in reversed(chain):
+                parent = names.parent
+                names._ancestry = 0 if parent is None else \
+                    parent._ancestry | _bloom(parent)
+        return self._ancestry
+
+    def __reduce__(self):
+        # Signatures are local to this process, so they're left behind
+        return (Names, (list(self),), {'parent': self.parent})
 
     def set_parent(self, parent):
         if not isinstance(parent, (Names, type(None))):
             name = type(parent).__name__
             raise TypeError("Can not add '%s' as a CSS Names Set" % name)
         self.parent = parent
+        self._ancestry = None
 
     def match(self, ns):
-        if type(ns) is str:
-            ns = ns.split('*')
-        (sublist, rest) = (ns[-1], ns[:-1])
-
-        if type(sublist) is str:
-            sublist = sublist.split(' ')
-
-        for name in sublist:
-            if name not in self:
-                return False 
-
-        # Do we need a parent tested? (and does one exist?)
-        if not rest or not getattr(self, 'parent', None):
-            return not bool(rest)
-
-        # Direct parent test (parent must match the next stanza)
-        if rest[-1] == '>':
-            return self.parent.match(rest[:-1])
-
-        # Indirect parent test (any parent can match the next stanza)
-        parent = self.parent
-        while parent and parent.match(rest):
-            parent = getattr(parent, 'parent', None)
-        return bool(parent)
-
-
-
+        if not isinstance(ns, Selector):
+            ns = Selector.compile(ns)
+        return ns.match(self)
@@ -0,0 +1,134 @@
+#
+# Copyright 2012-2014 Martin Owens <doctormo@gmail.com>
+# Copyright      2014 Ian Denhardt <ian@zenhack.net>
+#
+# This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>
+#
+"""
+Typed css values.
+
+Each value is still the string it was written as, so it compares equal to
+it and can be used wherever the string was, with the parsed parts kept
+alongside::
+
+ width: 10px;        obj.width == '10px', obj.width.value == 10
+ color: #ff0000;     obj.color.rgba == (255, 0, 0, 255)
+ icon: url(a.png);   obj.icon.url == 'a.png'
+
+Values are immutable, so the filters share one object between every use
+of the same text.
+"""
+
+import re
+
+
+class Value(str):
+    """A css value's text, with the fields named in `_fields`."""
+    _fields = ()
+
+    def __new__(cls, text, *args):
+        obj = str.__new__(cls, text)
+        obj.__dict__.update(zip(cls._fields, args))
+        return obj
+
+    def __getnewargs__(self):
+        return (str(self),) + tuple(getattr(self, name) for name in self._fields)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("'%s' values can't be changed" % type(self).__name__)
+
+    def __repr__(self):
+        return '%s(%s)' % (type(self).__name__, str.__repr__(self))
+
+
+class Length(Value):
+    """A length such as 10px, with its number in `value` and its lowercased
+    unit in `unit`."""
+    _fields = ('value', 'unit')
+
+
+class Color(Value):
+    """A colour, with its red, green, blue and alpha components from 0 to
+    255 in `rgba`."""
+    _fields = ('rgba',)
+
+
+class Url(Value):
+    """A url(...) value, with the unquoted address in `url`."""
+    _fields = ('url',)
+
+
+_LENGTH = re.compile(
+    r'([-+]?(?:\d+(?:\.\d*)?|\.\d+))(px|em|rem|ex|pt|pc|cm|mm|in|vh|vw|%)$',
+    re.I)
+
+_HEX = re.compile(r'#([0-9a-f]{3,4}|[0-9a-f]{6}|[0-9a-f]{8})$', re.I)
+
+_RGB = re.compile(r'rgba?\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*'
+                  r'(?:,\s*(\d*\.?\d+)\s*)?\)$', re.I)
+
+_URL = re.compile(r'url\(\s*(?:"([^"]*)"|\'([^\']*)\'|([^"\'\s)]*))\s*\)$',
+                  re.I)
+
+# The basic css colour keywords
+COLORS = {
+    'black': (0, 0, 0), 'silver': (192, 192, 192), 'gray': (128, 128, 128),
+    'white': (255, 255, 255), 'maroon': (128, 0, 0), 'red': (255, 0, 0),
+    'purple': (128, 0, 128), 'fuchsia': (255, 0, 255), 'green': (0, 128, 0),
+    'lime': (0, 255, 0), 'olive': (128, 128, 0), 'yellow': (255, 255, 0),
+    'navy': (0, 0, 128), 'blue': (0, 0, 255), 'teal': (0, 128, 128),
+    'aqua': (0, 255, 255),
+}
+
+
+def length_filter(value):
+    match = _LENGTH.match(value)
+    if match is None:
+        return NotImplemented
+    number = match.group(1)
+    number = float(number) if '.' in number else int(number)
+    return Length(value, number, match.group(2).lower())
+
+
+def color_filter(value):
+    if value[:1] == '#':
+        match = _HEX.match(value)
+        if match is None:
+            return NotImplemented
+        digits = match.group(1)
+        if len(digits) < 6:
+            digits = ''.join(digit * 2 for digit in digits)
+        if len(digits) == 6:
+            digits += 'ff'
+        return Color(value, tuple(int(digits[pos:pos + 2], 16)
+                                  for pos in (0, 2, 4, 6)))
+    key = value.lower()
+    if key in COLORS:
+        return Color(value, COLORS[key] + (255,))
+    if key == 'transparent':
+        return Color(value, (0, 0, 0, 0))
+    match = _RGB.match(value)
+    if match is None:
+        return NotImplemented
+    alpha = match.group(4)
+    alpha = 255 if alpha is None else int(round(min(float(alpha), 1) * 255))
+    return Color(value, tuple(min(int(part), 255)
+                              for part in match.group(1, 2, 3)) + (alpha,))
+
+
+def url_filter(value):
+    match = _URL.match(value)
+    if match is None:
+        return NotImplemented
+    return Url(value, next(part for part in match.groups() if part is not None))
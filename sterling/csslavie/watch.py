@@ -0,0 +1,78 @@
+#
+# Copyright 2012-2014 Martin Owens <doctormo@gmail.com>
+# Copyright      2014 Ian Denhardt <ian@zenhack.net>
+#
+# This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>
+#
+"""
+Watch a css file on disk and reload its stylesheet when it changes.
+
+The watcher doesn't run by itself; call `poll` from the application's main
+loop (on a timer, for instance) so that the attached objects are only ever
+updated from that loop::
+
+ watcher = FileWatcher(css, 'main.css')
+ ecore.Timer(0.5, lambda: watcher.poll() or True)
+"""
+
+import os
+import time
+import logging
+
+from .parse import CssSyntaxError
+
+log = logging.getLogger(__name__)
+
+
+class FileWatcher(object):
+    """Polls a file and reloads the stylesheet from it once it has stopped
+    changing for `debounce` seconds, so that an editor writing the file in
+    several steps only causes one reload."""
+
+    def __init__(self, sheet, filename, debounce=0.25, clock=time.time):
+        self.sheet = sheet
+        self.filename = filename
+        self.debounce = debounce
+        self.clock = clock
+        self._seen = self._stat()
+        self._changed_at = None
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.filename)
+        except OSError:
+            return None
+        return (stat.st_mtime, stat.st_size, stat.st_ino)
+
+    def poll(self):
+        """Checks the file, returns True if the stylesheet was reloaded"""
+        now = self.clock()
+        stat = self._stat()
+        if stat != self._seen:
+            (self._seen, self._changed_at) = (stat, now)
+            return False
+        if stat is None or self._changed_at is None:
+            return False
+        if now - self._changed_at < self.debounce:
+            return False
+
+        self._changed_at = None
+        with open(self.filename, 'r') as fhl:
+            content = fhl.read()
+        try:
+            self.sheet.reload(content)
+        except CssSyntaxError, error:
+            log.error("Not reloading '%s': %s" % (self.filename, error))
+            return False
+        return True
@@ -20,25 +20,151 @@ A frame is an xml reprentation widget.
 """
 
 from types import GeneratorType
-import xml.etree.ElementTree as ET
+from operator import attrgetter
+from cStringIO import StringIO
+import os
+import hashlib
+import weakref
 from abc import abstractmethod, ABCMeta
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 
 import sterling.csslavie as css
+from sterling.model import Collection
 
 SEQ_MODE = 1
 OBJ_MODE = 2
+VIRTUAL_MODE = 3
 
-_frame_types = None
+# The values of the mode attribute in frame files
+MODES = {'seq': SEQ_MODE, 'obj': OBJ_MODE, 'virtual': VIRTUAL_MODE}
 
+# Frame classes by the tag they are written with in frame files
+_frame_types = {}
+
+# Loaded files, least recently used first: absolute path ->
+# ((mtime, size), sha1 digest, spec), see `_parse` for what a spec is.
+_files = OrderedDict()
+# How many loaded files are kept in _files
+files_kept = 32
 
 def default_mode(obj):
-    if type(obj) in {list, tuple, GeneratorType}:
+    if type(obj) in {list, tuple, GeneratorType} or isinstance(obj, Collection):
         return SEQ_MODE
     else:
         return OBJ_MODE
 
 
+class Plan(object):
+    """What instantiating a frame needs, worked out once by `Frame.plan`.
+
+    context - a getter for the frame's ctx attribute, or None
+    mode - the declared mode, or None to pick one for each model
+    container - whether the frame's widgets are containers, or None if
+                the frame has no `_Widget` class to tell from
+    children - the child frames
+    getters - a getter for the model attribute named by each frame attribute
+    size - the elements in view, for VIRTUAL_MODE, else None
+    overscan - the elements kept either side of those in view, likewise
+    """
+    __slots__ = ('context', 'mode', 'container', 'children', 'getters',
+                 'size', 'overscan')
+
+    def __init__(self, frame):
+        self.context = attrgetter(frame.ctx) if frame.ctx else None
+        self.mode = frame.mode
+        widget = getattr(type(frame), '_Widget', None)
+        self.container = None if widget is None \
+            else hasattr(widget, 'raw_contents')
+        self.children = tuple(frame.children)
+        self.getters = dict((key, attrgetter(value))
+                            for key, value in (frame.attrs or {}).items())
+        self.size = self.overscan = None
+        if self.mode == VIRTUAL_MODE:
+            # The frame file's attributes win over the stylesheet's
+            attrs = frame.attrs or {}
+            self.size = _count(attrs.get('size') or
+                               getattr(frame, 'size', None), 50)
+            self.overscan = _count(attrs.get('overscan') or
+                                   getattr(frame, 'overscan', None), 10)
+
+
+def _count(value, default):
+    """Return the number of elements given by a frame attribute or style
+    value, which may be a `Length` such as 20px, counted by its number, or
+    default if it's unset."""
+    if value is None:
+        return default
+    if isinstance(value, css.Length):
+        value = value.value
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError("Expected a number of elements, not '%s'" % value)
+
+
+def _discarding(base, name):
+    """Return the method `name` of `base`, made to throw away the plan of
+    the frame owning the container first."""
+    method = getattr(base, name)
+
+    def discard(self, *args, **kwargs):
+        owner = self._owner()
+        if owner is not None:
+            owner._plan = None
+        return method(self, *args, **kwargs)
+    discard.__name__ = name
+    return discard
+
+
+class _Children(list):
+    """The child frames of a frame, which lose the frame's plan when changed
+    in place. They pickle as a plain list."""
+
+    def __init__(self, owner, children):
+        super(_Children, self).__init__(children)
+        self._owner = weakref.ref(owner)
+
+    def __reduce__(self):
+        return (list, (list(self),))
+
+for _name in ('__setitem__', '__delitem__', '__setslice__', '__delslice__',
+              '__iadd__', '__imul__', 'append', 'extend', 'insert', 'pop',
+              'remove', 'reverse', 'sort'):
+    setattr(_Children, _name, _discarding(list, _name))
+
+
+class _Attrs(dict):
+    """The attributes of a frame, which lose the frame's plan when changed
+    in place. They pickle as a plain dict."""
+
+    def __init__(self, owner, attrs):
+        super(_Attrs, self).__init__(attrs)
+        self._owner = weakref.ref(owner)
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+for _name in ('__setitem__', '__delitem__', 'clear', 'pop', 'popitem',
+              'setdefault', 'update'):
+    setattr(_Attrs, _name, _discarding(dict, _name))
+
+
+# Changing any of these attributes throws away a frame's plan, as does
+# changing the children or attrs in place, or the stylesheet's values.
+_PLANNED = frozenset(['ctx', 'mode', 'children', 'attrs',
+                      'size', 'overscan'])
+
+
+class FrameMeta(ABCMeta):
+    """Registers every subclass of `Frame` as it is defined, under its
+    lowercased class name, which is the tag used for it in frame files."""
+
+    def __init__(cls, name, bases, namespace):
+        super(FrameMeta, cls).__init__(name, bases, namespace)
+        if any(isinstance(base, FrameMeta) for base in bases):
+            _frame_types[name.lower()] = cls
+
+
 class Frame(css.PropertyObject):
     """A mapping from models to user interfaces.
 
@@ -47,8 +173,9 @@ class Frame(css.PropertyObject):
 
     Frames should not be created directly by the user; see `from_file`.
     """
-    __metaclass__ = ABCMeta
+    __metaclass__ = FrameMeta
     callbacks = ()
+    _plan = None
 
     def __init__(self, attrs=None, children=None):
         self.attrs = attrs
@@ -62,17 +189,63 @@ class Frame(css.PropertyObject):
 
         self.children = children or []
         self.ctx = attrs['ctx']
-        self.mode = attrs['mode']
+        self.mode = None
+        if attrs['mode']:
+            if attrs['mode'] not in MODES:
+                raise ValueError("Unknown frame mode '%s', expected one of %s"
+                                 % (attrs['mode'], ', '.join(sorted(MODES))))
+            self.mode = MODES[attrs['mode']]
 
         for child in children:
             child.parent = self
 
-    def widget_seq(self, data):
-        """Return a widget for each element of data, based on this frame."""
+    def __getstate__(self):
+        # Plans hold getters which don't pickle; they're rebuilt on use
+        state = self.__dict__.copy()
+        state.pop('_plan', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # Changing the containers in place has to throw the plan away again
+        for (name, cls) in (('children', _Children), ('attrs', _Attrs)):
+            value = state.get(name)
+            if value is not None:
+                self.__dict__[name] = cls(self, value)
+
+    def __setattr__(self, name, value):
+        if name in _PLANNED:
+            self._plan = None
+            if name == 'children' and value is not None:
+                value = _Children(self, value)
+            elif name == 'attrs' and value is not None:
+                value = _Attrs(self, value)
+        super(Frame, self).__setattr__(name, value)
+
+    def refresh(self, keys=None):
+        # The stylesheet may change values the plan was worked out from
+        if keys is None or not _PLANNED.isdisjoint(keys):
+            self._plan = None
+        super(Frame, self).refresh(keys)
+
+    def plan(self):
+        """Return the frame's `Plan`, compiling it on first use."""
+        if self._plan is None:
+            self._plan = Plan(self)
+        return self._plan
+
+    def widget_seq(self, data, parent):
+        """Return the widgets for every element of data, based on this frame."""
+        if isinstance(data, Collection):
+            data = data.rows()
         for datum in data:
-            for widget in self.widget_contents(datum, self):
+            for widget in self.widget_row(datum, parent):
                 yield widget
 
+    def widget_row(self, datum, parent):
+        """Return the list of widgets showing one element of a sequence."""
+        return [child.widget(datum, parent=parent) for child in self.children]
+
     def widget_contents(self, data, parent):
         """Return a generator of all direct child widgets of this frame.
 
@@ -81,8 +254,9 @@ class Frame(css.PropertyObject):
         to be created.
         """
         mode = self.mode or default_mode(data)
-        if mode is SEQ_MODE:
-            self.widget_seq(data)
+        if mode in (SEQ_MODE, VIRTUAL_MODE):
+            for widget in self.widget_seq(data, parent):
+                yield widget
         else:
             for child in self.children:
                 yield child.widget(data, parent=parent)
@@ -91,12 +265,28 @@ class Frame(css.PropertyObject):
         """Return a widget for this frame, based on `data`.
 
         TODO: how is this different from `make_widget`? document."""
-        if self.ctx:
-            data = getattr(data, self.ctx)
+        plan = self._plan or self.plan()
+        if plan.context is not None:
+            data = plan.context(data)
         ret = self.make_widget(data, parent)
-        if hasattr(ret, 'raw_contents'):
-            for w in self.widget_contents(data, ret):
-                ret.add(w)
+        container = plan.container
+        if container is None:
+            container = hasattr(ret, 'raw_contents')
+        if not container:
+            return ret
+        mode = plan.mode or default_mode(data)
+        if mode is VIRTUAL_MODE:
+            ret.show_virtual(self, data)
+        elif mode is OBJ_MODE:
+            for child in plan.children:
+                ret.add(child.widget(data, ret))
+        elif isinstance(data, Collection):
+            ret.show_rows(self, data)
+        else:
+            add, children = ret.add, plan.children
+            for datum in data:
+                for child in children:
+                    add(child.widget(datum, ret))
         return ret
 
     @abstractmethod
@@ -108,20 +298,128 @@ class Frame(css.PropertyObject):
         """
 
 
-def from_file(filename):
-    """Load a frame from the given xml file."""
-    root = ET.parse(filename).getroot()
-    return _from_xml(root)
+class Include(Frame):
+    """Stands in for the frame in another file, named by its src attribute
+    relative to the including file, which is only loaded once it's needed.
+    The included frame's widgets take the include's place."""
+
+    def __init__(self, attrs=None, children=None):
+        super(Include, self).__init__(attrs, children or [])
+        self.base = ''
+        self._frame = None
 
+    @property
+    def frame(self):
+        """The included frame, loaded the first time it's asked for."""
+        if self._frame is None:
+            self._frame = from_file(os.path.join(self.base, self.attrs['src']))
+            self._frame.parent = getattr(self, 'parent', None)
+            if self._css is not None:
+                self._css[0].attach_all(self._frame, self._css[1].parent)
+        return self._frame
 
-def _from_xml(root):
-    # The first time we run this, we need to populate the table of frame types:
-    global _frame_types
-    if _frame_types is None:
-        _frame_types = {}
-        for cls in Frame.__subclasses__():
-            _frame_types[cls.__name__.lower()] = cls
+    def widget(self, data, parent=None):
+        plan = self._plan or self.plan()
+        if plan.context is not None:
+            data = plan.context(data)
+        return self.frame.widget(data, parent)
+
+    def make_widget(self, data, parent=None):
+        return self.frame.make_widget(data, parent)
+
+
+def from_file(filename, cached=True):
+    """Load a frame from the given xml file.
 
+    The file is parsed into a spec of the frames to build, see `_parse`,
+    which is small since identical subtrees share one spec, then the frames
+    are built from it.
+
+    The specs of the last `files_kept` files loaded are kept, and loading
+    the same file again only builds the frames, unless the file's mtime
+    and size changed and its content hashes differently. Every call returns
+    frames of its own, which may be styled and changed. Pass `cached=False`
+    to neither use nor fill the cache.
+    """
+    base = os.path.dirname(filename)
+    if not cached:
+        return _build(_parse(filename), base)
+    path = os.path.abspath(filename)
+    stat = os.stat(path)
+    stamp = (stat.st_mtime, stat.st_size)
+    entry = _files.pop(path, None)
+    if entry is None or entry[0] != stamp:
+        with open(path, 'rb') as fhl:
+            content = fhl.read()
+        digest = hashlib.sha1(content).hexdigest()
+        if entry is None or entry[1] != digest:
+            entry = (stamp, digest, _parse(StringIO(content)))
+        else:
+            entry = (stamp, digest, entry[2])
+    _files[path] = entry
+    while len(_files) > files_kept:
+        _files.popitem(last=False)
+    return _build(entry[2], base)
+
+
+def _parse(source):
+    """Return the spec of the frames in the xml source: a tuple of the
+    frame class, its attributes as sorted (name, value) pairs and the specs
+    of its children. Identical subtrees are the same spec.
+
+    Each element is dropped as soon as its spec exists, so only the
+    elements still open are held."""
+    try:
+        import xml.etree.cElementTree as ET
+    except ImportError:
+        import xml.etree.ElementTree as ET
+    elements, children, specs = [], [[]], {}
+    for event, element in ET.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            elements.append(element)
+            children.append([])
+            continue
+        kids = tuple(children.pop())
+        # Children are already shared, so they're the same when equal
+        key = (element.tag, tuple(sorted(element.attrib.items())),
+               tuple(map(id, kids)))
+        spec = specs.get(key)
+        if spec is None:
+            spec = specs[key] = (_frame_types[element.tag.lower()],
+                                 key[1], kids)
+        children[-1].append(spec)
+        elements.pop()
+        if elements:
+            # The element just closed is the last child of its parent
+            del elements[-1][-1]
+    return children[0][0]
+
+
+def _build(spec, base):
+    """Return new frames built from `spec`, with includes loading relative
+    to the directory `base`."""
+    stack, built = [(spec, False)], []
+    while stack:
+        spec, ready = stack.pop()
+        (cls, attrs, kids) = spec
+        if not ready:
+            stack.append((spec, True))
+            stack.extend((child, False) for child in reversed(kids))
+            continue
+        count = len(kids)
+        kids = built[len(built) - count:]
+        del built[len(built) - count:]
+        fr = cls(attrs=dict(attrs), children=kids)
+        if isinstance(fr, Include):
+            fr.base = base
+        built.append(fr)
+    return built[0]
+
+
+def _make_frame(tag, attrs, children):
+    return _frame_types[tag.lower()](attrs=dict(attrs), children=children)
+
+
+def _from_xml(root):
     children = map(_from_xml, root)
-    frame_cls = _frame_types[root.tag.lower()]
-    return frame_cls(attrs=root.attrib, children=children)
+    return _make_frame(root.tag, root.attrib, children)
@@ -16,6 +16,112 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>
 
 
+import weakref
+import contextlib
+from abc import ABCMeta, abstractmethod
+
+# The kinds of row delta reported by collection models
+INSERT, REMOVE, MOVE, REPLACE = 'insert', 'remove', 'move', 'replace'
+
+# The attribute collection models flag when their rows change
+ROWS = 'rows'
+
+# Models waiting for dispatch while a batch is open, None otherwise.
+_queue = None
+
+
+@contextlib.contextmanager
+def batch():
+    """Defer `do_updates` until the outermost batch exits.
+
+    Models changed inside the block, or whose `do_updates` is called inside
+    it, are dispatched once when it exits, in the order they were first
+    changed. Batches nest; only the outermost one dispatches.
+    """
+    global _queue
+    if _queue is not None:
+        yield
+        return
+    _queue = queue = []
+    try:
+        yield
+    finally:
+        _queue = None
+        for model in queue:
+            object.__setattr__(model, '_queued', False)
+            model.do_updates()
+
+
+class Subscription(object):
+    """A handle on one subscription made by `Model.subscribe`."""
+
+    def __init__(self, model, attr, subscriber):
+        self.model = model
+        self.attr = attr
+        self.subscriber = subscriber
+
+    def cancel(self):
+        """Stop calling the subscriber; cancelling twice is harmless."""
+        if self.model is not None:
+            self.model._unsubscribe(self.attr, self.subscriber)
+            if isinstance(self.subscriber, _WeakSubscriber):
+                self.subscriber.detach()
+            self.model = None
+
+
+class _WeakSubscriber(object):
+    """Calls a bound method or function without keeping it alive. Its
+    model drops the subscription once the target is collected."""
+
+    def __init__(self, model, attr, subscriber):
+        target = getattr(subscriber, 'im_self', None)
+        if target is None:
+            target, self.func = subscriber, None
+        else:
+            self.func = subscriber.im_func
+        self._hash = hash((id(target), self.func))
+        model = weakref.ref(model)
+
+        def prune(_):
+            if model() is not None:
+                model()._prune(attr)
+        self.ref = weakref.ref(target, prune)
+
+    def detach(self):
+        """Stop the model being told once the target is collected, as after
+        the subscription is cancelled."""
+        target = self.ref()
+        if target is not None:
+            # The reference holding the callback goes, and the callback
+            # with it
+            self.ref = weakref.ref(target)
+
+    def __call__(self, model):
+        target = self.ref()
+        if target is not None:
+            if self.func is None:
+                target(model)
+            else:
+                self.func(target, model)
+
+    def __eq__(self, other):
+        # Compares the targets themselves, as a dead target's id may have
+        # been given to a new object
+        if self is other:
+            return True
+        if not isinstance(other, _WeakSubscriber) or \
+                self.func is not other.func:
+            return False
+        target = self.ref()
+        return target is not None and target is other.ref()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return self._hash
+
+
 class Model(object):
     """a model in the traditional MVC sense
 
@@ -23,10 +129,13 @@ class Model(object):
     to subscribe to updates to the object's attributes.
 
     Assignment to the model's attributes will flag those attributes as
-    changed if any subscriptions exist. `subscribe` registers a handler
+    changed once the model is initialized. `subscribe` registers a handler
     for updates to a given attribute, and `do_updates` actually invokes
     the subscribers.
     """
+    # Assignments are only tracked once __init__ sets this to a set.
+    changed = None
+    _queued = False
 
     def __init__(self):
         """Initialize the model.
@@ -34,30 +143,75 @@ class Model(object):
         Subclasses of `Model` *must* invoke `Model`'s `__init__`.
         """
         self.subscriptions = {}
-        # Setting changed causes the object to watch for updates; prior
-        # to this setattr will work as  normal:
         self.changed = set()
 
     def __setattr__(self, key, value):
-        if hasattr(self, 'changed'):
-            self.changed.add(key)
+        changed = self.changed
+        if changed is not None:
+            if _queue is not None and not self._queued:
+                self._enqueue()
+            changed.add(key)
         super(Model, self).__setattr__(key, value)
 
+    def _flag(self, key):
+        """Flag `key` as changed without assigning it."""
+        if _queue is not None and not self._queued:
+            self._enqueue()
+        self.changed.add(key)
+
+    def _enqueue(self):
+        object.__setattr__(self, '_queued', True)
+        _queue.append(self)
+
     def do_updates(self):
         """Notify subscribers of any changed attributes.
 
         `do_updates` invokes each subscriber whose attribute has changed with
-        the model as its argument. The order in which the subscribers are
-        called is unspecified. When `do_updates` returns, all attributes will
-        be flagged as unchanged.
+        the model as its argument. A subscriber listening to several changed
+        attributes is called once. Subscribing one callable to an attribute
+        twice is kept as two subscriptions, each cancelled on its own, so
+        it is called as many times as it was subscribed to any single one
+        of the changed attributes. Subscribers are called in the order of
+        their attribute names, then of subscription. When `do_updates`
+        returns, the attributes it dispatched are flagged as unchanged;
+        assignments made by the subscribers are kept for the next call.
+
+        Inside a `batch` the dispatch is deferred until the batch exits.
         """
-        for key in self.subscriptions.keys():
-            if key in self.changed:
-                for subscriber in self.subscriptions[key]:
-                    subscriber(self)
+        if _queue is not None:
+            if not self._queued:
+                self._enqueue()
+            return
+        changed = self.changed
+        if not changed:
+            return
         super(Model, self).__setattr__('changed', set())
+        subscriptions = self.subscriptions
+        order = []
+        most = {}
+        for key in sorted(changed):
+            subscribers = subscriptions.get(key)
+            if not subscribers:
+                continue
+            if len(subscribers) == 1:
+                subscriber = subscribers[0]
+                if subscriber not in most:
+                    order.append(subscriber)
+                    most[subscriber] = 1
+                continue
+            counts = {}
+            for subscriber in subscribers:
+                count = counts[subscriber] = counts.get(subscriber, 0) + 1
+                seen = most.get(subscriber, 0)
+                if count > seen:
+                    if not seen:
+                        order.append(subscriber)
+                    most[subscriber] = count
+        for subscriber in order:
+            for _ in xrange(most[subscriber]):
+                subscriber(self)
 
-    def subscribe(self, attr, subscriber):
+    def subscribe(self, attr, subscriber, weak=False):
         """Subscribe to updates to the attribute `attr`.
 
         Parameters:
@@ -66,8 +220,217 @@ class Model(object):
             subscriber - a callable accepting a single argument, which will be
                          the model itself. `subscriber` will be called by
                          `do_updates` if the attribute has changed.
+            weak - if true, the model only holds a weak reference to the
+                   subscriber (or to the object of a bound method), and the
+                   subscription is dropped once that is collected.
+
+        Returns a `Subscription` whose `cancel` method unsubscribes.
         """
+        if weak:
+            subscriber = _WeakSubscriber(self, attr, subscriber)
         if attr not in self.subscriptions:
             self.subscriptions[attr] = [subscriber]
         else:
             self.subscriptions[attr].append(subscriber)
+        return Subscription(self, attr, subscriber)
+
+    def _prune(self, attr):
+        current = self.subscriptions.get(attr)
+        if current is None:
+            return
+        subscribers = [subscriber for subscriber in current
+                       if not isinstance(subscriber, _WeakSubscriber)
+                       or subscriber.ref() is not None]
+        if subscribers:
+            current[:] = subscribers
+        else:
+            del self.subscriptions[attr]
+
+    def _unsubscribe(self, attr, subscriber):
+        subscribers = self.subscriptions.get(attr, ())
+        for pos, other in enumerate(subscribers):
+            if other is subscriber:
+                del subscribers[pos]
+                if not subscribers:
+                    del self.subscriptions[attr]
+                return
+
+
+class Collection(Model):
+    """A model holding rows, which reports exactly how they change.
+
+    Every change to the rows appends a delta to `deltas` and flags the
+    `ROWS` attribute. While `do_updates` calls the subscribers of `ROWS`
+    the deltas they should apply are in `dispatched`, oldest first:
+
+        (INSERT, index, items) - items were inserted before index
+        (REMOVE, index, count) - count rows were removed from index
+        (REPLACE, index, items) - the rows from index were replaced
+        (MOVE, index, to) - the row at index was moved to be at to
+    """
+    __metaclass__ = ABCMeta
+
+    def __init__(self):
+        super(Collection, self).__init__()
+        object.__setattr__(self, 'deltas', [])
+        object.__setattr__(self, 'dispatched', ())
+
+    @abstractmethod
+    def rows(self):
+        """Return the current rows, in order."""
+
+    def _delta(self, kind, index, arg):
+        deltas = self.deltas
+        if kind == INSERT and deltas:
+            last = deltas[-1]
+            if last[0] == INSERT and last[1] + len(last[2]) == index:
+                deltas[-1] = (INSERT, last[1], last[2] + arg)
+                return
+        deltas.append((kind, index, arg))
+        self._flag(ROWS)
+
+    def do_updates(self):
+        if _queue is not None or not self.changed:
+            return super(Collection, self).do_updates()
+        object.__setattr__(self, 'dispatched', self.deltas)
+        object.__setattr__(self, 'deltas', [])
+        try:
+            super(Collection, self).do_updates()
+        finally:
+            object.__setattr__(self, 'dispatched', ())
+
+
+class ListModel(Collection):
+    """An observable list. Indexing takes single positions, not slices."""
+
+    def __init__(self, items=()):
+        super(ListModel, self).__init__()
+        object.__setattr__(self, '_items', list(items))
+
+    def rows(self):
+        return self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __contains__(self, item):
+        return item in self._items
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def index(self, item):
+        return self._items.index(item)
+
+    def _position(self, index):
+        if not -len(self._items) <= index < len(self._items):
+            raise IndexError('list index out of range')
+        return index % len(self._items)
+
+    def __setitem__(self, index, item):
+        index = self._position(index)
+        self._items[index] = item
+        self._delta(REPLACE, index, [item])
+
+    def __delitem__(self, index):
+        index = self._position(index)
+        del self._items[index]
+        self._delta(REMOVE, index, 1)
+
+    def insert(self, index, item):
+        index = max(0, min(len(self._items), index if index >= 0
+                           else len(self._items) + index))
+        self._items.insert(index, item)
+        self._delta(INSERT, index, [item])
+
+    def append(self, item):
+        self.insert(len(self._items), item)
+
+    def extend(self, items):
+        items = list(items)
+        if items:
+            index = len(self._items)
+            self._items.extend(items)
+            self._delta(INSERT, index, items)
+
+    def pop(self, index=-1):
+        index = self._position(index)
+        item = self._items.pop(index)
+        self._delta(REMOVE, index, 1)
+        return item
+
+    def remove(self, item):
+        del self[self._items.index(item)]
+
+    def move(self, index, to):
+        """Move the row at `index` so that it ends up at `to`."""
+        index, to = self._position(index), self._position(to)
+        if index != to:
+            self._items.insert(to, self._items.pop(index))
+            self._delta(MOVE, index, to)
+
+
+class DictModel(Collection):
+    """An observable mapping, ordered by insertion. Its rows are its values,
+    so a new key inserts a row at the end."""
+
+    def __init__(self, items=()):
+        super(DictModel, self).__init__()
+        object.__setattr__(self, '_keys', [])
+        object.__setattr__(self, '_values', {})
+        for key, value in getattr(items, 'items', lambda: items)():
+            if key not in self._values:
+                self._keys.append(key)
+            self._values[key] = value
+
+    def rows(self):
+        return [self._values[key] for key in self._keys]
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __contains__(self, key):
+        return key in self._values
+
+    def __getitem__(self, key):
+        return self._values[key]
+
+    def get(self, key, default=None):
+        return self._values.get(key, default)
+
+    def keys(self):
+        return list(self._keys)
+
+    def values(self):
+        return self.rows()
+
+    def items(self):
+        return [(key, self._values[key]) for key in self._keys]
+
+    def __setitem__(self, key, value):
+        if key in self._values:
+            self._values[key] = value
+            self._delta(REPLACE, self._keys.index(key), [value])
+        else:
+            self._values[key] = value
+            self._keys.append(key)
+            self._delta(INSERT, len(self._keys) - 1, [value])
+
+    def __delitem__(self, key):
+        del self._values[key]
+        index = self._keys.index(key)
+        del self._keys[index]
+        self._delta(REMOVE, index, 1)
+
+    def pop(self, key, *default):
+        if key not in self._values and default:
+            return default[0]
+        value = self._values[key]
+        del self[key]
+        return value
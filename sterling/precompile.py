@@ -0,0 +1,104 @@
+#
+# Copyright 2014 Ian Denhardt <ian@zenhack.net>
+# Copyright      Martin Owens <doctormo@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>
+"""
+Compile a frame and its stylesheet ahead of time.
+
+Loading a compiled file skips parsing the xml and the css and matching the
+selectors against the frames, which `sterling.app.run` otherwise does on
+every start::
+
+ python -m sterling.precompile hello.xml hello.css -o hello.sterling
+
+Compiled files are pickles, so only load ones you made yourself.
+"""
+
+import os
+import sys
+import cPickle as pickle
+
+from sterling import frame
+from sterling.csslavie import CssParser
+from sterling.csslavie.parse import StyleSheet
+
+# Declares the frame classes the frame files refer to
+from sterling import widget
+
+# Bumped whenever the contents of compiled files change
+FORMAT = 1
+
+
+def compile_frame(framespec, stylesheet):
+    """Return the frame in `framespec`, with every include loaded and the
+    whole tree attached to the stylesheet in the file `stylesheet`, and
+    that stylesheet."""
+    fr = frame.from_file(framespec, cached=False)
+    sheet = CssParser(stylesheet)
+    sheet.attach_all(fr)
+    # Includes attach what they load to the stylesheet they are attached to
+    stack = [fr]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, frame.Include):
+            stack.append(current.frame)
+        stack.extend(current.children)
+    return fr, sheet
+
+
+def save(filename, fr, sheet, stylesheet=None):
+    """Write a compiled frame and stylesheet to `filename`. `stylesheet`
+    is the css file, kept so that it can still be watched for changes."""
+    artifact = {'format': FORMAT, 'frame': fr, 'sheet': sheet,
+                'stylesheet': stylesheet and os.path.abspath(stylesheet)}
+    with open(filename, 'wb') as fhl:
+        pickle.dump(artifact, fhl, pickle.HIGHEST_PROTOCOL)
+
+
+def load(filename):
+    """Return the frame, stylesheet and css filename in a compiled file.
+    Raises ValueError if it was compiled by another version of sterling."""
+    with open(filename, 'rb') as fhl:
+        artifact = pickle.load(fhl)
+    if not isinstance(artifact, dict) or artifact.get('format') != FORMAT or \
+            artifact['sheet'].cache_format != StyleSheet.cache_format:
+        raise ValueError("'%s' was compiled by another version of sterling, "
+                         "compile it again" % filename)
+    return artifact['frame'], artifact['sheet'], artifact['stylesheet']
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(
+        prog='python -m sterling.precompile',
+        description='Compile a frame and its stylesheet ahead of time.')
+    parser.add_argument('frame', help='the frame xml file')
+    parser.add_argument('stylesheet', nargs='?',
+                        help='the css file, by default the frame file '
+                             'with a .css extension')
+    parser.add_argument('-o', '--output',
+                        help='the compiled file, by default the frame file '
+                             'with a .sterling extension')
+    args = parser.parse_args(argv)
+    base = os.path.splitext(args.frame)[0]
+    stylesheet = args.stylesheet or base + '.css'
+    output = args.output or base + '.sterling'
+    fr, sheet = compile_frame(args.frame, stylesheet)
+    save(output, fr, sheet, stylesheet)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
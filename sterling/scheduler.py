@@ -0,0 +1,154 @@
+#
+# Copyright 2014 Ian Denhardt <ian@zenhack.net>
+# Copyright      Martin Owens <doctormo@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>
+"""
+Deliver model updates once per main loop iteration.
+
+Widgets mark their model dirty when a callback changes it, and the
+scheduler flushes every dirty model together from the main loop, so a
+burst of events only refreshes the widgets once. Changes to the style
+properties a widget renders are collected the same way, and each widget
+is repainted once per flush however many of them changed. The loop itself is
+plugged in as a hook; `app.run` installs one for EFL, and tests drive a
+`ManualLoop` by hand.
+"""
+
+import time
+
+from sterling.model import batch
+
+
+class Scheduler(object):
+    """Collects dirty models and flushes them from the main loop.
+
+    `hook` is a callable taking `(callback, delay)` which must call
+    `callback` once, on a later loop iteration at least `delay` seconds
+    from now. Without a hook every `mark` flushes straight away, as
+    calling `do_updates` directly would. Changing the hook forgets any
+    flush the old one was given, which the next mark schedules again.
+    `min_interval` caps the flush rate, in seconds between flushes.
+
+    `marked` counts the calls to `mark`, `style_changes` those to
+    `mark_style`, `coalesced` the calls of either that were folded into an
+    already scheduled flush, `flushes` the flushes that delivered anything
+    and `repaints` the widgets those flushes restyled.
+    """
+
+    def __init__(self, hook=None, min_interval=0, clock=time.time):
+        self.hook = hook
+        self.min_interval = min_interval
+        self.clock = clock
+        self.marked = 0
+        self.coalesced = 0
+        self.flushes = 0
+        self.style_changes = 0
+        self.repaints = 0
+        self._dirty = []
+        self._styled = []
+        self._styles = {}
+        self._pending = False
+        self._last = None
+
+    @property
+    def hook(self):
+        return self._hook
+
+    @hook.setter
+    def hook(self, hook):
+        # The old hook's loop may never run the flush it was given
+        self._hook = hook
+        self._pending = False
+
+    def mark(self, model):
+        """Flag `model` as having changes to deliver on the next flush."""
+        self.marked += 1
+        if model not in self._dirty:
+            self._dirty.append(model)
+        self._schedule()
+
+    def mark_style(self, widget, key):
+        """Flag the style property `key` of `widget` as changed, for the
+        widget's `restyle` to apply on the next flush."""
+        self.style_changes += 1
+        keys = self._styles.get(widget)
+        if keys is None:
+            keys = self._styles[widget] = set()
+            self._styled.append(widget)
+        keys.add(key)
+        self._schedule()
+
+    def _schedule(self):
+        if self._hook is None:
+            self.flush()
+        elif self._pending:
+            self.coalesced += 1
+        else:
+            self._pending = True
+            delay = 0
+            if self.min_interval and self._last is not None:
+                delay = max(0, self._last + self.min_interval - self.clock())
+            self._hook(self.flush, delay)
+
+    def flush(self):
+        """Deliver the updates of every dirty model, in the order marked,
+        then repaint the widgets whose style changed.
+
+        Models and widgets marked while flushing are left for the next
+        flush.
+        """
+        self._pending = False
+        dirty, self._dirty = self._dirty, []
+        styled, self._styled = self._styled, []
+        styles, self._styles = self._styles, {}
+        if not dirty and not styled:
+            return
+        self.flushes += 1
+        self._last = self.clock()
+        with batch():
+            for model in dirty:
+                model.do_updates()
+        for widget in styled:
+            self.repaints += 1
+            widget.restyle(styles[widget])
+
+
+class ManualLoop(object):
+    """A loop hook for a `Scheduler` that only runs when told to, with
+    its own clock, for tests and headless use."""
+
+    def __init__(self):
+        self.time = 0.0
+        self._calls = []
+
+    def __call__(self, callback, delay):
+        self._calls.append((self.time + delay, callback))
+
+    def clock(self):
+        return self.time
+
+    def iterate(self, advance=0):
+        """Advance the clock and run the callbacks that are due,
+        returning how many ran."""
+        self.time += advance
+        due = [call for call in self._calls if call[0] <= self.time]
+        self._calls = [call for call in self._calls if call[0] > self.time]
+        for _, callback in due:
+            callback()
+        return len(due)
+
+
+# Used by the widgets; app.run gives it a hook for the EFL main loop.
+scheduler = Scheduler()
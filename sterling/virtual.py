@@ -0,0 +1,111 @@
+#
+# Copyright 2014 Ian Denhardt <ian@zenhack.net>
+# Copyright      Martin Owens <doctormo@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>
+"""
+Show a window onto a long sequence without building a row for every element.
+
+`VirtualRows` keeps rows only for the elements in view plus some overscan
+either side, and reuses the rows that scroll out of the window for the
+ones that scroll in. It knows nothing about widgets; the container hands
+it functions to make and rebind rows, so it can be driven without a
+toolkit.
+"""
+
+from sterling.model import Collection
+
+
+class VirtualRows(object):
+    """The rows showing `size` elements of `data` from `first`, plus
+    `overscan` elements either side.
+
+    `make_row(datum)` returns a new row for `datum`. `bind_row(row, datum)`
+    shows `datum` in a row that showed something else and returns the row
+    to use, which may be a new one if `row` can't be reused.
+
+    `rows` are the rows for `data[start:stop]`, and `spare` the rows the
+    last update dropped, for the caller to dispose of. `made` and
+    `recycled` count the rows built and the rows reused.
+    """
+
+    def __init__(self, data, make_row, bind_row, size=50, overscan=10):
+        if not isinstance(data, Collection) and \
+                not hasattr(data, '__getitem__'):
+            data = list(data)
+        self.data = data
+        self.make_row = make_row
+        self.bind_row = bind_row
+        self.size = size
+        self.overscan = overscan
+        self.first = 0
+        self.start = self.stop = 0
+        self.rows = []
+        self.spare = []
+        self._shown = []
+        self.made = 0
+        self.recycled = 0
+        self.update()
+
+    def _items(self):
+        if isinstance(self.data, Collection):
+            return self.data.rows()
+        return self.data
+
+    def span(self, count=None):
+        """Return the (start, stop) range of elements that should have rows."""
+        if count is None:
+            count = len(self._items())
+        first = max(0, min(self.first, count - self.size))
+        return (max(0, first - self.overscan),
+                min(count, first + self.size + self.overscan))
+
+    def scroll_to(self, first):
+        """Make `first` the first element in view; returns whether any row
+        changed."""
+        self.first = max(0, first)
+        return self.update()
+
+    def update(self):
+        """Bring the rows in line with the window and the data, only
+        touching rows whose element changed. Returns whether any did."""
+        items = self._items()
+        start, stop = self.span(len(items))
+        old_start, old_rows, old_shown = self.start, self.rows, self._shown
+        old_stop = old_start + len(old_rows)
+        # Rows leaving the window are reused first, for rows entering it
+        spare = [row for pos, row in enumerate(old_rows)
+                 if not start <= old_start + pos < stop]
+        rows, shown = [], []
+        changed = bool(spare) or (start, stop) != (old_start, old_stop)
+        for index in xrange(start, stop):
+            datum = items[index]
+            if old_start <= index < old_stop:
+                row = old_rows[index - old_start]
+                if old_shown[index - old_start] is not datum:
+                    row = self.bind_row(row, datum)
+                    self.recycled += 1
+                    changed = True
+            elif spare:
+                row = self.bind_row(spare.pop(), datum)
+                self.recycled += 1
+            else:
+                row = self.make_row(datum)
+                self.made += 1
+            rows.append(row)
+            shown.append(datum)
+        self.start, self.stop = start, stop
+        self.rows, self._shown = rows, shown
+        self.spare = spare
+        return changed
@@ -16,16 +16,44 @@
 #  along with this program.  If not, see <http://www.gnu.org/licenses/>
 #
 """
-EFL based widgets to display the kinds of things we want... more docs to follow.
+Widgets to display the kinds of things we want... more docs to follow.
+
+The toolkit objects behind the widgets come from the current backend, see
+`sterling.backends`.
 """
 
-from sterling import frame
+from sterling import frame, backends
+from sterling.model import ROWS, INSERT, REMOVE, MOVE, REPLACE
+from sterling.scheduler import scheduler
+from sterling.virtual import VirtualRows
 from sterling.frame import Frame
-from efl.elementary import window, box, button
+
+import weakref
 
 from abc import ABCMeta, abstractmethod
 
 
+class _StyleWatcher(object):
+    """Watches the style properties `keys` of a frame for a widget, without
+    keeping either alive; it stops watching once the widget is collected."""
+
+    def __init__(self, widget, fr, keys):
+        watcher, fr = weakref.ref(self), weakref.ref(fr)
+
+        def prune(_):
+            if watcher() is not None and fr() is not None:
+                for key in keys:
+                    fr().unwatch(watcher(), key)
+        self.ref = weakref.ref(widget, prune)
+        for key in keys:
+            fr().watch(self, key)
+
+    def __call__(self, fr, key, value):
+        widget = self.ref()
+        if widget is not None:
+            scheduler.mark_style(widget, key)
+
+
 class Widget(object):
     """A GUI widget (in the traditional sense).
 
@@ -34,6 +62,10 @@ class Widget(object):
     """
     __metaclass__ = ABCMeta
 
+    # The style properties of its frame the widget renders, see restyle
+    styles = ()
+    _style_watcher = None
+
     def attach_callbacks(self, data):
         """Attach attributes of `data` to the callbacks for this widget.
 
@@ -56,12 +88,28 @@ class Widget(object):
 
             def wrapped_callback(obj):
                 if cb in self.frame.attrs:
-                    real_cb = getattr(data, self.frame.attrs[cb])
+                    # Widgets keeping their model in `data` may be rebound
+                    model = getattr(self, 'data', data)
+                    real_cb = getattr(model, self.frame.attrs[cb])
                     real_cb(obj)
-                    data.do_updates()
+                    scheduler.mark(model)
 
             cb_add(wrapped_callback)
 
+    def watch_styles(self):
+        """Restyle the widget when the style properties in its 'styles'
+        attribute change on its frame, such as when the stylesheet is
+        reloaded. Changes are collected by the scheduler, which calls
+        `restyle` once per flush with all the keys that changed.
+
+        As with `attach_callbacks`, self must have a `frame` attribute.
+        """
+        if self.styles:
+            self._style_watcher = _StyleWatcher(self, self.frame, self.styles)
+
+    def restyle(self, keys):
+        """Apply the style properties `keys` of the frame, which changed."""
+
     @abstractmethod
     def raw(self):
         """Return the backend toolkit's widget.
@@ -70,6 +118,18 @@ class Widget(object):
         portable code should never use this.
         """
 
+    def destroy(self):
+        """Release the widget once it has been removed from its parent."""
+        if self._style_watcher is not None:
+            for key in self.styles:
+                self.frame.unwatch(self._style_watcher, key)
+        self.raw().delete()
+
+    def rebind(self, data):
+        """Show `data` instead of the current model, returning whether the
+        widget could; widgets that can't are rebuilt instead."""
+        return False
+
 
 class Container(Widget):
 
@@ -93,6 +153,123 @@ class Container(Widget):
     def add(self, child):
         """Add the child widget `child`."""
 
+    @abstractmethod
+    def insert(self, child, before=None):
+        """Add the child widget `child` before the child `before`, or at the
+        end if that is None."""
+
+    @abstractmethod
+    def remove(self, child):
+        """Take the child widget `child` out, without destroying it."""
+
+    def show_rows(self, fr, data):
+        """Add the widgets of `fr` for every row of the collection model
+        `data`, and from then on apply its deltas to just the rows that
+        change instead of rebuilding them all."""
+        self._row_frame = fr
+        self._rows = []
+        for datum in data.rows():
+            self._insert_row(len(self._rows), datum)
+        self._rows_subscription = data.subscribe(ROWS, self.update_rows,
+                                                 weak=True)
+
+    def update_rows(self, data):
+        """Apply the deltas being dispatched by `data` to the rows."""
+        for kind, index, arg in data.dispatched:
+            if kind == INSERT:
+                for offset, datum in enumerate(arg):
+                    self._insert_row(index + offset, datum)
+            elif kind == REMOVE:
+                for _ in xrange(arg):
+                    self._remove_row(index)
+            elif kind == REPLACE:
+                for offset, datum in enumerate(arg):
+                    self._remove_row(index + offset)
+                    self._insert_row(index + offset, datum)
+            elif kind == MOVE:
+                row = self._rows.pop(index)
+                for child in row:
+                    self.remove(child)
+                self._rows.insert(arg, row)
+                self._place_row(arg)
+
+    def show_virtual(self, fr, data):
+        """Add the widgets of `fr` for just the rows of the sequence `data`
+        in view, reusing them as `scroll_to` moves the view."""
+        self._row_frame = fr
+        self._discarded = []
+        plan = fr.plan()
+        self._virtual = VirtualRows(data, self._make_row, self._bind_row,
+                                    plan.size, plan.overscan)
+        for row in self._virtual.rows:
+            for child in row:
+                self.add(child)
+        if hasattr(data, 'subscribe'):
+            self._rows_subscription = data.subscribe(
+                ROWS, self._update_virtual, weak=True)
+
+    def scroll_to(self, first):
+        """Bring element `first` of a virtual sequence into view."""
+        old = (self._virtual.start, self._virtual.rows)
+        if self._virtual.scroll_to(first):
+            self._repack_virtual(*old)
+
+    def _update_virtual(self, data):
+        old = (self._virtual.start, self._virtual.rows)
+        if self._virtual.update():
+            self._repack_virtual(*old)
+
+    def _repack_virtual(self, old_start, old):
+        """Unpack the rows which left their place since the rows `old`
+        were shown from element `old_start`, and pack those taking one."""
+        virtual = self._virtual
+        was = dict((id(row), old_start + pos) for pos, row in enumerate(old))
+        stay = set(id(row) for pos, row in enumerate(virtual.rows)
+                   if was.get(id(row)) == virtual.start + pos)
+        for row in old:
+            if id(row) not in stay:
+                for child in row:
+                    self.remove(child)
+        for row in virtual.spare + self._discarded:
+            for child in row:
+                child.destroy()
+        self._discarded = []
+        before = None
+        for row in reversed(virtual.rows):
+            if id(row) not in stay:
+                for child in row:
+                    self.insert(child, before)
+            if row:
+                before = row[0]
+
+    def _make_row(self, datum):
+        return self._row_frame.widget_row(datum, self)
+
+    def _bind_row(self, row, datum):
+        if len(row) == len(self._row_frame.children) and \
+                all(child.rebind(datum) for child in row):
+            return row
+        self._discarded.append(row)
+        return self._make_row(datum)
+
+    def _insert_row(self, index, datum):
+        self._rows.insert(index, self._row_frame.widget_row(datum, self))
+        self._place_row(index)
+
+    def _place_row(self, index):
+        before = None
+        for pos in xrange(index + 1, len(self._rows)):
+            if self._rows[pos]:
+                before = self._rows[pos][0]
+                break
+        for child in self._rows[index]:
+            self.insert(child, before)
+
+    def _remove_row(self, index):
+        for child in self._rows.pop(index):
+            self.remove(child)
+            child.destroy()
+
     def make_children(self, data):
         """Generate a sequence of child widgets based on the container's frame."""
         mode = self.frame.mode or frame.default_mode(data)
@@ -105,7 +282,7 @@ class Container(Widget):
 
 
 class Window(Frame):
-    """A widow widget based ontop of the window and box EFL widgets"""
+    """A window widget based ontop of the backend's window and box"""
 
     def make_widget(self, data, parent=None):
         if parent is not None:
@@ -117,14 +294,25 @@ class Window(Frame):
 
     class _Widget(Container):
 
+        styles = ['horizontal']
+
         def __init__(self, data, frame):
-            self._win = window.StandardWindow('test', 'Test')
-            self._box = box.Box(self._win)
+            toolkit = backends.get()
+            self.frame = frame
+            # Widgets only subscribe weakly to their models, so the
+            # container keeps them alive
+            self._children = set()
+            self._win = toolkit.window('test', 'Test')
+            self._box = toolkit.box(self._win)
             if hasattr(frame, 'horizontal'):
                 self._box.horizontal_set(frame.horizontal)
             self._win.resize_object_add(self._box)
             self._box.show()
             self._win.show()
+            self.watch_styles()
+
+        def restyle(self, keys):
+            self._box.horizontal_set(getattr(self.frame, 'horizontal', False))
 
         def raw(self):
             return self._win
@@ -133,8 +321,20 @@ class Window(Frame):
             return self._box
 
         def add(self, child):
+            self._children.add(child)
             self._box.pack_end(child.raw())
 
+        def insert(self, child, before=None):
+            self._children.add(child)
+            if before is None:
+                self._box.pack_end(child.raw())
+            else:
+                self._box.pack_before(child.raw(), before.raw())
+
+        def remove(self, child):
+            self._children.remove(child)
+            self._box.unpack(child.raw())
+
 
 class Button(Frame):
 
@@ -144,19 +344,36 @@ class Button(Frame):
     class _Widget(Widget):
 
         callbacks = ['clicked']
+        styles = ['disabled']
 
         def __init__(self, data, parent, fr):
-            self._btn = button.Button(parent.raw_contents())
+            self._btn = backends.get().button(parent.raw_contents())
             self.data = data
             self.frame = fr
-            if 'text' in fr.attrs:
-                self._btn.text = getattr(data, fr.attrs['text'])
+            if hasattr(fr, 'disabled'):
+                self._btn.disabled_set(fr.disabled)
+            self._text = fr.plan().getters.get('text')
+            if self._text is not None:
+                self._btn.text = self._text(data)
             self.attach_callbacks(data)
-            data.subscribe(fr.attrs['text'], self.update)
+            self.watch_styles()
+            self._subscription = data.subscribe(fr.attrs['text'],
+                                                self.update, weak=True)
             self._btn.show()
 
         def update(self, data):
-            self._btn.text = getattr(data, self.frame.attrs['text'])
+            self._btn.text = self._text(data)
+
+        def restyle(self, keys):
+            self._btn.disabled_set(getattr(self.frame, 'disabled', False))
+
+        def rebind(self, data):
+            self._subscription.cancel()
+            self.data = data
+            self._subscription = data.subscribe(self.frame.attrs['text'],
+                                                self.update, weak=True)
+            self.update(data)
+            return True
 
         def raw(self):
             return self._btn
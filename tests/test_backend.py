@@ -0,0 +1,200 @@
+import gc
+import os
+import shutil
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+
+from sterling import app, backends, frame, widget
+from sterling.backends import null
+from sterling.model import Model, ListModel
+from sterling.scheduler import scheduler
+from sterling.csslavie.parse import StyleSheet
+
+
+class Hello(Model):
+    def __init__(self):
+        super(Hello, self).__init__()
+        self.first = 'hello'
+        self.last = 'goodbye'
+
+    def do_it(self, obj):
+        self.first += '!'
+
+
+class Item(Model):
+    def __init__(self, title):
+        super(Item, self).__init__()
+        self.title = title
+
+
+class Items(Model):
+    def __init__(self, count):
+        super(Items, self).__init__()
+        self.items = ListModel(Item(str(n)) for n in range(count))
+
+
+class NullBackendTestCase(unittest.TestCase):
+    """Test the frame, widget and model pipeline on the null backend"""
+
+    def setUp(self):
+        self.previous = backends._current
+        self.toolkit = backends.use(null.Backend())
+
+    def tearDown(self):
+        backends._current = self.previous
+
+    def build(self, xml, data):
+        return frame._from_xml(ET.fromstring(xml)).widget(data)
+
+    def texts(self):
+        win, = self.toolkit.windows
+        box, = win.children
+        return [button.text for button in box.children]
+
+    def count(self, *kinds):
+        return tuple(len([op for op in self.toolkit.ops if op[0] == kind])
+                     for kind in kinds)
+
+    def test_01_use(self):
+        """Backends are picked by name or given directly"""
+        self.assertTrue(backends.get() is self.toolkit)
+        self.assertTrue(isinstance(backends.use('null'), null.Backend))
+        self.assertRaises(ValueError, backends.use, 'nothing')
+
+    def test_02_hello(self):
+        """Callbacks update the model and the widgets showing it"""
+        data = Hello()
+        win = self.build('<window><button text="first" clicked="do_it" />'
+                         '<button text="last" /></window>', data)
+        self.assertEqual(self.texts(), ['hello', 'goodbye'])
+        win.raw_contents().children[0].emit('clicked')
+        self.assertEqual(self.texts(), ['hello!', 'goodbye'])
+        data.last = 'bye'
+        data.do_updates()
+        self.assertEqual(self.texts(), ['hello!', 'bye'])
+
+    def test_03_rows(self):
+        """Collection deltas are applied to the packed widgets"""
+        data = Items(3)
+        win = self.build('<window ctx="items"><button text="title" />'
+                         '</window>', data)
+        items = data.items
+        items.append(Item('3'))
+        items.move(0, 2)
+        del items[1]
+        items[0] = Item('x')
+        items.do_updates()
+        self.assertEqual(self.texts(), ['x', '0', '3'])
+        self.assertEqual(len(win.raw_contents().children), 3)
+
+    def test_04_virtual(self):
+        """Virtual containers pack and reuse only the rows in view"""
+        data = Items(1000)
+        win = self.build('<window ctx="items" mode="virtual" size="3" '
+                         'overscan="1"><button text="title" /></window>',
+                         data)
+        self.assertEqual(self.texts(), ['0', '1', '2', '3'])
+        made = len([op for op in self.toolkit.ops if op[0] == 'new'])
+        win.scroll_to(500)
+        self.assertEqual(self.texts(), ['499', '500', '501', '502', '503'])
+        packed = self.count('pack', 'unpack')
+        win.scroll_to(501)
+        self.assertEqual(self.texts(), ['500', '501', '502', '503', '504'])
+        self.assertEqual(self.count('pack', 'unpack'),
+                         (packed[0] + 1, packed[1] + 1))
+        win.scroll_to(500)
+        data.items[501].title = 'x'
+        data.items[501].do_updates()
+        self.assertEqual(self.texts(), ['499', '500', 'x', '502', '503'])
+        self.assertEqual(
+            len([op for op in self.toolkit.ops if op[0] == 'new']), made + 1)
+
+    def test_05_restyle(self):
+        """Style changes repaint the widgets rendering them once"""
+        fr = frame._from_xml(ET.fromstring(
+            '<window ctx="items"><button text="title" /></window>'))
+        css = StyleSheet('button { disabled: false; }')
+        css.attach_all(fr)
+        (hook, scheduler.hook) = (scheduler.hook, self.toolkit.schedule)
+        (changes, repaints) = (scheduler.style_changes, scheduler.repaints)
+        try:
+            win = fr.widget(Items(3))
+            css.reload('button { disabled: true; }\n'
+                       'window { horizontal: true; }')
+            css.reload('button { disabled: true; width: 2; }\n'
+                       'window { horizontal: false; }')
+            css.reload('button { disabled: true; }\n'
+                       'window { horizontal: true; }')
+            self.assertEqual(self.toolkit.loop.iterate(), 1)
+        finally:
+            scheduler.hook = hook
+        self.assertEqual(scheduler.style_changes - changes, 6)
+        self.assertEqual(scheduler.repaints - repaints, 4)
+        box = win.raw_contents()
+        self.assertEqual(box.props['horizontal'], True)
+        self.assertEqual([b.props['disabled'] for b in box.children],
+                         [True] * 3)
+        self.assertEqual(len([op for op in self.toolkit.ops
+                              if op[0] in ('disabled', 'horizontal')]), 7)
+
+    def test_06_dropped(self):
+        """Collected widgets stop watching their frame's styles"""
+        fr = frame._from_xml(ET.fromstring(
+            '<window ctx="items"><button text="title" /></window>'))
+        win = fr.widget(Items(1000))
+        button, = fr.children
+        self.assertEqual(len(button._watch['disabled']), 1000)
+        # The toolkit objects keep the widgets' callbacks until the window
+        # is gone from the backend too
+        del win, self.toolkit.windows[:], self.toolkit.ops[:]
+        gc.collect()
+        self.assertEqual(len(button._watch['disabled']), 0)
+        self.assertEqual(len(fr._watch['horizontal']), 0)
+
+    def test_07_virtual_style(self):
+        """The stylesheet sizes virtual containers the frame doesn't"""
+        fr = frame._from_xml(ET.fromstring(
+            '<window ctx="items" mode="virtual" overscan="0">'
+            '<button text="title" /></window>'))
+        StyleSheet('window { size: 2; overscan: 5; }').attach_all(fr)
+        win = fr.widget(Items(100))
+        self.assertEqual(self.texts(), ['0', '1'])
+        self.assertRaises(ValueError, frame._from_xml,
+                          ET.fromstring('<window mode="list" />'))
+
+    def test_08_size_style(self):
+        """Only virtual containers count their size and overscan"""
+        fr = frame._from_xml(ET.fromstring(
+            '<window ctx="items"><button text="title" size="big" /></window>'))
+        StyleSheet('button { size: 12px; } window { overscan: 1em; }'
+                   ).attach_all(fr)
+        fr.widget(Items(2))
+        self.assertEqual(self.texts(), ['0', '1'])
+        self.assertEqual(fr.plan().size, None)
+        fr = frame._from_xml(ET.fromstring(
+            '<window ctx="items" mode="virtual"><button /></window>'))
+        StyleSheet('window { size: 3px; overscan: 1; }').attach_all(fr)
+        self.assertEqual((fr.plan().size, fr.plan().overscan), (3, 1))
+        fr.attrs['size'] = 'big'
+        self.assertRaises(ValueError, fr.plan)
+
+    def test_09_run(self):
+        """Running an app leaves the scheduler with the hook it had"""
+        folder = tempfile.mkdtemp()
+        try:
+            for (name, content) in (('hello.xml', '<window><button '
+                                     'text="first" /></window>'),
+                                    ('hello.css', 'button { weight: 1; }')):
+                with open(os.path.join(folder, name), 'w') as fhl:
+                    fhl.write(content)
+            hook = scheduler.hook
+            app.run(Hello(), os.path.join(folder, 'hello.xml'),
+                    os.path.join(folder, 'hello.css'), backend=self.toolkit)
+            self.assertTrue(scheduler.hook is hook)
+            self.assertRaises(OSError, app.run, Hello(),
+                              os.path.join(folder, 'missing.xml'),
+                              backend=self.toolkit)
+            self.assertTrue(scheduler.hook is hook)
+        finally:
+            shutil.rmtree(folder)
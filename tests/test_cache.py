@@ -0,0 +1,90 @@
+#!/usr/bin/python
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+
+import os
+import sys
+import shutil
+import tempfile
+
+sys.path.insert(0, '../')
+
+import unittest
+from sterling.csslavie import CssParser
+from sterling.csslavie import parse
+try:
+    from test import test_support
+except ImportError:
+    from test import support as test_support
+
+
+def no_parse(content, filters=None):
+    raise AssertionError("Style sheet was parsed again")
+
+
+class CacheTestCase(unittest.TestCase):
+    """Test the compiled style sheet cache."""
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.css = os.path.join(self.dir, 'test.css')
+        self.cache = os.path.join(self.dir, 'cache')
+        shutil.copy("data/test1.css", self.css)
+        self._parse_css = parse._parse_css
+
+    def tearDown(self):
+        parse._parse_css = self._parse_css
+        shutil.rmtree(self.dir)
+
+    def test_01_reload(self):
+        """Load without parsing"""
+        first = CssParser(self.css, cache_dir=self.cache)
+        self.assertEqual(len(os.listdir(self.cache)), 1)
+        parse._parse_css = no_parse
+        second = CssParser(self.css, cache_dir=self.cache)
+        self.assertEqual(first._index, second._index)
+        self.assertEqual(first._buckets, second._buckets)
+        self.assertEqual(second.filters, first.filters)
+
+    def test_02_changed(self):
+        """Changed content is parsed"""
+        CssParser(self.css, cache_dir=self.cache)
+        with open(self.css, 'a') as fhl:
+            fhl.write("extra { value: 8; }")
+        css = CssParser(self.css, cache_dir=self.cache)
+        self.assertTrue('extra' in css._index)
+        self.assertEqual(len(os.listdir(self.cache)), 2)
+
+    def test_03_filters(self):
+        """Filters change the key"""
+        class Filtered(parse.StyleSheet):
+            filters = [parse.bool_filter]
+        self.assertNotEqual(parse.StyleSheet.cache_key('a {}'),
+                            Filtered.cache_key('a {}'))
+
+    def test_04_corrupt(self):
+        """Bad cache files are replaced"""
+        CssParser(self.css, cache_dir=self.cache)
+        (name,) = os.listdir(self.cache)
+        with open(os.path.join(self.cache, name), 'w') as fhl:
+            fhl.write('not a pickle')
+        css = CssParser(self.css, cache_dir=self.cache)
+        self.assertTrue('name' in css._index)
+
+
+if __name__ == '__main__':
+    test_support.run_unittest(
+       CacheTestCase,
+    )
@@ -0,0 +1,102 @@
+import unittest
+
+from sterling.model import Collection, ListModel, DictModel, batch, \
+    ROWS, INSERT, REMOVE, MOVE, REPLACE
+from sterling import frame
+
+
+class Mirror(object):
+    """Replays the deltas of a collection on a plain list, as a container
+    does with its rows of widgets"""
+    def __init__(self, model):
+        self.rows = list(model.rows())
+        self.seen = []
+        model.subscribe(ROWS, self.update, weak=True)
+
+    def update(self, model):
+        self.seen.extend(model.dispatched)
+        for kind, index, arg in model.dispatched:
+            if kind == INSERT:
+                self.rows[index:index] = arg
+            elif kind == REMOVE:
+                del self.rows[index:index + arg]
+            elif kind == REPLACE:
+                self.rows[index:index + len(arg)] = arg
+            elif kind == MOVE:
+                self.rows.insert(arg, self.rows.pop(index))
+
+
+class ListModelTestCase(unittest.TestCase):
+    """Test list models report item level deltas"""
+
+    def setUp(self):
+        self.model = ListModel(['a', 'b', 'c'])
+        self.mirror = Mirror(self.model)
+
+    def test_01_deltas(self):
+        """Every kind of change is reported and can be replayed"""
+        self.model.append('d')
+        self.model.insert(0, 'z')
+        del self.model[1]
+        self.model[-1] = 'e'
+        self.model.move(0, 2)
+        self.assertEqual(self.model.pop(), 'e')
+        self.model.remove('b')
+        self.assertEqual(self.mirror.seen, [])
+        self.model.do_updates()
+        self.assertEqual(self.mirror.seen, [
+            (INSERT, 3, ['d']), (INSERT, 0, ['z']), (REMOVE, 1, 1),
+            (REPLACE, 3, ['e']), (MOVE, 0, 2), (REMOVE, 3, 1),
+            (REMOVE, 0, 1)])
+        self.assertEqual(self.mirror.rows, list(self.model))
+        self.assertEqual(list(self.model), ['c', 'z'])
+        self.assertEqual(self.model.dispatched, ())
+
+    def test_02_appends_merged(self):
+        """Appending rows one at a time is sent as one insert"""
+        for n in range(100):
+            self.model.append(n)
+        self.model.extend([100, 101])
+        self.model.do_updates()
+        self.assertEqual(self.mirror.seen, [(INSERT, 3, range(102))])
+        self.model.do_updates()
+        self.assertEqual(len(self.mirror.seen), 1)
+
+    def test_03_batch(self):
+        """Deltas wait for the end of a batch"""
+        with batch():
+            self.model.append('d')
+            self.model.do_updates()
+            self.model.append('e')
+            self.assertEqual(self.mirror.seen, [])
+        self.assertEqual(self.mirror.seen, [(INSERT, 3, ['d', 'e'])])
+
+    def test_04_errors(self):
+        """Bad positions raise like a list would"""
+        self.assertRaises(IndexError, self.model.__setitem__, 3, 'x')
+        self.assertRaises(IndexError, self.model.pop, 5)
+        self.assertRaises(ValueError, self.model.remove, 'x')
+        self.assertEqual(self.model.deltas, [])
+        self.assertRaises(TypeError, Collection)
+
+    def test_05_mode(self):
+        """Collection models are shown as sequences"""
+        self.assertEqual(frame.default_mode(self.model), frame.SEQ_MODE)
+        self.assertEqual(frame.default_mode(DictModel()), frame.SEQ_MODE)
+
+
+class DictModelTestCase(unittest.TestCase):
+    """Test mapping models report deltas on their values"""
+
+    def test_01_deltas(self):
+        model = DictModel([('a', 1), ('b', 2)])
+        mirror = Mirror(model)
+        model['c'] = 3
+        model['a'] = 4
+        del model['b']
+        self.assertEqual(model.pop('x', None), None)
+        model.do_updates()
+        self.assertEqual(mirror.seen, [
+            (INSERT, 2, [3]), (REPLACE, 0, [4]), (REMOVE, 1, 1)])
+        self.assertEqual(mirror.rows, model.values())
+        self.assertEqual(model.items(), [('a', 4), ('c', 3)])
@@ -0,0 +1,216 @@
+import os
+import cPickle as pickle
+import shutil
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+
+from sterling import frame
+from sterling.frame import Frame
+from sterling.model import Model
+from sterling.csslavie.parse import StyleSheet
+
+
+class Widget(object):
+    def __init__(self, data, parent, fr):
+        self.data = data
+        self.children = []
+
+
+class Container(Widget):
+    def raw_contents(self):
+        return self
+
+    def add(self, child):
+        self.children.append(child)
+
+
+class Testbox(Frame):
+    _Widget = Container
+
+    def make_widget(self, data, parent=None):
+        return self._Widget(data, parent, self)
+
+
+class Testlabel(Frame):
+    class _Widget(Widget):
+        def __init__(self, data, parent, fr):
+            Widget.__init__(self, data, parent, fr)
+            self.text = fr.plan().getters['text'](data)
+
+    def make_widget(self, data, parent=None):
+        return self._Widget(data, parent, self)
+
+
+class Item(Model):
+    def __init__(self, title):
+        super(Item, self).__init__()
+        self.title = title
+
+
+class PlanTestCase(unittest.TestCase):
+    """Test frames are compiled into plans once"""
+
+    def setUp(self):
+        self.label = Testlabel(attrs={'text': 'title'}, children=[])
+        self.frame = Testbox(attrs={'ctx': 'items', 'mode': 'seq'},
+                             children=[self.label])
+        self.data = Model()
+        self.data.items = [Item('a'), Item('b')]
+
+    def test_01_plan(self):
+        """The plan reflects the frame and is kept"""
+        plan = self.frame.plan()
+        self.assertTrue(plan is self.frame.plan())
+        self.assertEqual(plan.mode, frame.SEQ_MODE)
+        self.assertTrue(plan.container)
+        self.assertFalse(self.label.plan().container)
+        self.assertEqual(plan.children, (self.label,))
+        self.assertEqual(plan.context(self.data), self.data.items)
+
+    def test_02_widget(self):
+        """Widgets are built from the plan"""
+        widget = self.frame.widget(self.data)
+        self.assertEqual([child.text for child in widget.children],
+                         ['a', 'b'])
+
+    def test_03_invalidate(self):
+        """Changing what a plan depends on throws it away"""
+        plan = self.frame.plan()
+        self.frame.ctx = None
+        self.assertFalse(plan is self.frame.plan())
+        self.frame.mode = frame.OBJ_MODE
+        widget = self.frame.widget(Item('c'))
+        self.assertEqual([child.text for child in widget.children], ['c'])
+
+    def test_04_invalidate_in_place(self):
+        """Changing the children or attrs in place throws the plan away"""
+        self.frame.plan()
+        self.frame.children.append(Testlabel(attrs={'text': 'title'},
+                                             children=[]))
+        self.assertEqual(len(self.frame.plan().children), 2)
+        self.label.attrs['text'] = 'detail'
+        item = Item('a')
+        item.detail = 'b'
+        self.assertEqual(self.label.widget(item).text, 'b')
+        copy = pickle.loads(pickle.dumps(self.frame, 2))
+        copy.plan()
+        del copy.children[0]
+        self.assertEqual(len(copy.plan().children), 1)
+        self.frame.mode = frame.VIRTUAL_MODE
+        self.frame.plan()
+        StyleSheet('testbox { size: 3; }').attach_all(self.frame)
+        self.assertEqual(self.frame.plan().size, 3)
+
+
+class LoadTestCase(unittest.TestCase):
+    """Test frames are loaded from files, streaming, with includes"""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write(self, name, content):
+        path = os.path.join(self.dir, name)
+        with open(path, 'w') as fhl:
+            fhl.write(content)
+        return path
+
+    def shape(self, fr):
+        return (type(fr).__name__, fr.attrs,
+                [self.shape(child) for child in fr.children])
+
+    def test_01_streaming(self):
+        """Loading a file builds the same frames as the whole tree would"""
+        content = ('<testbox ctx="items"><testbox class="row">'
+                   '<testlabel text="title" /><testlabel text="detail" />'
+                   '</testbox><testlabel text="total" /></testbox>')
+        fr = frame.from_file(self.write('main.xml', content))
+        self.assertEqual(self.shape(fr),
+                         self.shape(frame._from_xml(ET.fromstring(content))))
+        self.assertTrue(fr.children[0].children[1].parent is fr.children[0])
+
+    def test_02_include(self):
+        """Included files are only read when their frame is needed"""
+        path = self.write('main.xml', '<testbox ctx="items">'
+                          '<include src="row.xml" /></testbox>')
+        fr = frame.from_file(path)
+        include, = fr.children
+        self.assertEqual(include._frame, None)
+        self.write('row.xml', '<testlabel class="big" text="title" />')
+        data = Model()
+        data.items = [Item('a'), Item('b')]
+        sheet = StyleSheet('testbox .big { weight: 3; }')
+        sheet.attach_all(fr)
+        widget = fr.widget(data)
+        self.assertEqual([child.text for child in widget.children],
+                         ['a', 'b'])
+        self.assertTrue(include.frame.parent is fr)
+        self.assertEqual(include.frame.weight, 3)
+
+    def test_03_cached(self):
+        """Loading a file again reuses its spec until the content changes"""
+        path = self.write('main.xml', '<testlabel text="title" />')
+        fr = frame.from_file(path)
+        spec = frame._files[os.path.abspath(path)][2]
+        again = frame.from_file(path)
+        self.assertFalse(again is fr)
+        self.assertEqual(self.shape(again), self.shape(fr))
+        os.utime(path, (0, 0))
+        frame.from_file(path)
+        self.assertTrue(frame._files[os.path.abspath(path)][2] is spec)
+        self.assertFalse(frame.from_file(path, cached=False) is fr)
+        self.write('main.xml', '<testlabel text="detail" />')
+        self.assertEqual(frame.from_file(path).attrs, {'text': 'detail'})
+
+    def test_04_private(self):
+        """Every load gets frames of its own, even for identical subtrees"""
+        row = '<testbox><testlabel text="title" /></testbox>'
+        path = self.write('main.xml', '<testbox><testbox class="a">%s%s'
+                          '</testbox>%s</testbox>' % ((row,) * 3))
+        (one, two) = (frame.from_file(path), frame.from_file(path))
+        first, second = one.children[0].children
+        self.assertFalse(first is second)
+        self.assertEqual(self.shape(first), self.shape(second))
+        self.assertTrue(first.children[0].parent is first)
+        StyleSheet('testbox testlabel { weight: 1; }').attach_all(one)
+        StyleSheet('testbox testlabel { weight: 2; }').attach_all(two)
+        self.assertEqual([first.children[0].weight,
+                          second.children[0].weight,
+                          two.children[0].children[0].children[0].weight],
+                         [1, 1, 2])
+
+    def test_05_shared_spec(self):
+        """Identical subtrees share a spec, which later loads don't parse"""
+        row = '<testbox><testlabel text="title" /></testbox>'
+        path = self.write('main.xml', '<testbox>%s</testbox>' % (row * 10))
+        parsed = []
+        parse = frame._parse
+        frame._parse = lambda source: parsed.append(1) or parse(source)
+        try:
+            frame.from_file(path)
+            fr = frame.from_file(path)
+        finally:
+            frame._parse = parse
+        self.assertEqual(parsed, [1])
+        spec = frame._files[os.path.abspath(path)][2]
+        self.assertEqual(len(set(map(id, spec[2]))), 1)
+        self.assertEqual(len(set(map(id, fr.children))), 10)
+
+    def test_06_bounded(self):
+        """Only the last files_kept files loaded are kept"""
+        kept = frame.files_kept
+        frame.files_kept = 2
+        try:
+            paths = [self.write('%d.xml' % n, '<testlabel text="title" />')
+                     for n in range(3)]
+            for path in paths + paths[1:2]:
+                frame.from_file(path)
+            self.assertEqual(list(frame._files)[-2:],
+                             [os.path.abspath(paths[2]),
+                              os.path.abspath(paths[1])])
+            self.assertEqual(len(frame._files), 2)
+        finally:
+            frame.files_kept = kept
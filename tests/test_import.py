@@ -0,0 +1,43 @@
+import os
+import sys
+import subprocess
+import unittest
+
+from sterling import frame
+from sterling.frame import Frame
+
+SCRIPT = '''
+import sys, time
+start = time.time()
+import sterling.app
+print('%f %s' % (time.time() - start, ' '.join(sys.modules)))
+'''
+
+# Generous, so slow machines pass; the import takes a few ms
+BUDGET = 0.25
+
+
+class ImportTestCase(unittest.TestCase):
+    """Test sterling starts quickly and without a toolkit"""
+
+    def test_01_lazy(self):
+        """Importing the app loads neither a toolkit nor the slow modules"""
+        env = dict(os.environ, PYTHONPATH=os.path.abspath('..'))
+        out = subprocess.check_output([sys.executable, '-c', SCRIPT], env=env)
+        taken, modules = out.split(' ', 1)
+        modules = set(modules.split())
+        for name in ('efl', 'tempfile', 'xml.etree.ElementTree'):
+            self.assertFalse(name in modules, name)
+        self.assertTrue(float(taken) < BUDGET)
+
+    def test_02_registry(self):
+        """Every frame class is registered when it is defined"""
+        class Testbase(Frame):
+            def make_widget(self, data, parent=None):
+                pass
+
+        class Testderived(Testbase):
+            pass
+        self.assertTrue(frame._frame_types['testbase'] is Testbase)
+        self.assertTrue(frame._frame_types['testderived'] is Testderived)
+        self.assertFalse('frame' in frame._frame_types)
@@ -1,5 +1,6 @@
+import gc
 import unittest
-from sterling.model import Model
+from sterling.model import Model, batch
 
 
 class TestModel(unittest.TestCase):
@@ -42,6 +43,140 @@ class TestModel(unittest.TestCase):
         self.model.do_updates()
         assert self.called == 2
 
+    def test_05_coalesced(self):
+        """A subscriber to several changed attrs is called once."""
+        self.model.subscribe('foo', self.set_called)
+        self.model.subscribe('bar', self.set_called)
+        self.model.foo = 1
+        self.model.bar = 2
+        self.model.foo = 3
+        self.model.do_updates()
+        self.assertEqual(self.called, 1)
+        self.model.do_updates()
+        self.assertEqual(self.called, 1)
+
+    def test_06_batch(self):
+        """Models changed in a batch are dispatched once, in order, on exit."""
+        other = Model()
+        calls = []
+        self.model.subscribe('foo', lambda m: calls.append('model'))
+        other.subscribe('foo', lambda m: calls.append('other'))
+        with batch():
+            other.foo = 1
+            self.model.foo = 1
+            with batch():
+                self.model.foo = 2
+                self.model.do_updates()
+            other.do_updates()
+            self.assertEqual(calls, [])
+        self.assertEqual(calls, ['other', 'model'])
+
+    def test_07_batch_before(self):
+        """Changes made before a batch are dispatched by it if asked."""
+        self.model.subscribe('foo', self.set_called)
+        self.model.foo = 1
+        with batch():
+            self.model.do_updates()
+            self.assertEqual(self.called, 0)
+        self.assertEqual(self.called, 1)
+
+    def test_08_changed_while_dispatching(self):
+        """Assignments made by a subscriber are kept for the next call."""
+        def bump(model):
+            model.bar = model.foo + 1
+        self.model.subscribe('foo', bump)
+        self.model.subscribe('bar', self.set_called)
+        self.model.foo = 1
+        self.model.do_updates()
+        self.assertEqual(self.called, 0)
+        self.model.do_updates()
+        self.assertEqual((self.called, self.model.bar), (1, 2))
+
+    def test_09_cancel(self):
+        """A cancelled subscriber is no longer called or kept."""
+        handle = self.model.subscribe('foo', self.set_called)
+        self.model.subscribe('foo', self.set_called)
+        handle.cancel()
+        handle.cancel()
+        self.model.foo = 1
+        self.model.do_updates()
+        self.assertEqual(self.called, 1)
+        self.assertEqual(len(self.model.subscriptions['foo']), 1)
+
+    def test_10_weak(self):
+        """A weak subscription doesn't keep its object alive."""
+        listener = Listener(self.model)
+        self.model.subscribe('bar', self.set_called)
+        self.model.foo = self.model.bar = 1
+        self.model.do_updates()
+        self.assertEqual((listener.called, self.called), (1, 1))
+        del listener
+        self.assertEqual(list(self.model.subscriptions), ['bar'])
+
+    def test_11_weak_coalesced(self):
+        """Weak subscriptions of one method are coalesced like strong ones."""
+        listener = Listener(self.model)
+        self.model.subscribe('bar', listener.update, weak=True)
+        self.model.foo = self.model.bar = 1
+        self.model.do_updates()
+        self.assertEqual(listener.called, 1)
+
+    def test_12_no_leak(self):
+        """Creating and dropping 100k listeners doesn't grow memory."""
+        for _ in range(1000):
+            Listener(self.model)
+        gc.collect()
+        before = len(gc.get_objects())
+        gc.disable()
+        try:
+            for _ in range(100000):
+                Listener(self.model)
+            self.assertTrue(len(gc.get_objects()) - before < 100)
+        finally:
+            gc.enable()
+        self.assertEqual(self.model.subscriptions, {})
+        self.assertTrue(len(gc.get_objects()) - before < 100)
+
+    def test_13_weak_cancelled(self):
+        """Cancelled weak subscriptions are left alone once collected."""
+        listener = Listener(self.model)
+        handle = self.model.subscribe('bar', listener.update, weak=True)
+        other = Listener(self.model)
+        handle.cancel()
+        self.assertEqual(list(self.model.subscriptions), ['foo'])
+        errors = []
+        self.model._prune = lambda attr: errors.append(attr)
+        del listener
+        self.assertEqual(errors, ['foo'])
+        del self.model._prune
+        self.model._prune('bar')
+        self.assertNotEqual(handle.subscriber,
+                            self.model.subscriptions['foo'][0])
+
+    def test_14_batch_dirty(self):
+        """Models already changed before a batch are dispatched by it."""
+        self.model.subscribe('foo', self.set_called)
+        self.model.foo = 1
+        with batch():
+            self.model.foo = 2
+        self.assertEqual((self.called, self.model.changed), (1, set()))
+
+    def test_15_duplicates(self):
+        """A subscriber subscribed twice is called twice per dispatch."""
+        first = self.model.subscribe('foo', self.set_called)
+        self.model.subscribe('foo', self.set_called)
+        self.model.subscribe('bar', self.set_called)
+        self.model.foo = self.model.bar = 1
+        self.model.do_updates()
+        self.assertEqual(self.called, 2)
+        self.model.bar = 2
+        self.model.do_updates()
+        self.assertEqual(self.called, 3)
+        first.cancel()
+        self.model.foo = self.model.bar = 3
+        self.model.do_updates()
+        self.assertEqual(self.called, 4)
+
     def set_called(self, model):
         """Increment self.called.
 
@@ -51,3 +186,13 @@ class TestModel(unittest.TestCase):
         has been called.
         """
         self.called += 1
+
+
+class Listener(object):
+    """Stands in for a widget, subscribing weakly to its model"""
+    def __init__(self, model):
+        self.called = 0
+        model.subscribe('foo', self.update, weak=True)
+
+    def update(self, model):
+        self.called += 1
@@ -0,0 +1,110 @@
+#!/usr/bin/python
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+
+import os
+import sys
+import shutil
+import tempfile
+
+sys.path.insert(0, '../')
+
+import unittest
+from sterling.csslavie import PropertyObject
+from sterling.csslavie.parse import StyleSheet
+try:
+    from test import test_support
+except ImportError:
+    from test import support as test_support
+
+
+class Name(PropertyObject):
+    value = 0
+
+
+def make_tree(width, depth):
+    root = Name(name="parent")
+    level = [root]
+    for n in range(depth):
+        below = []
+        for item in level:
+            item.children = [Name(name=["child", "name"][n % 2],
+                                  classes=['name'] if n % 3 else None)
+                             for _ in range(width)]
+            below.extend(item.children)
+        level = below
+    return root
+
+
+def walk(obj):
+    yield obj
+    for child in getattr(obj, 'children', None) or []:
+        for item in walk(child):
+            yield item
+
+
+class ParallelTestCase(unittest.TestCase):
+    """Test building and attaching stylesheets with worker processes."""
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.files = []
+        for (n, content) in enumerate(['#name { value: 1; }\n',
+                                       'data/test1.css',
+                                       '#name { value: 8; }\n'
+                                       'name { sticky: 9; }\n']):
+            if content.endswith('.css'):
+                with open(content, 'r') as fhl:
+                    content = fhl.read()
+            self.files.append(os.path.join(self.dir, '%d.css' % n))
+            with open(self.files[-1], 'w') as fhl:
+                fhl.write(content)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_01_files(self):
+        """Files Cascade In Order"""
+        serial = StyleSheet.from_files(self.files)
+        parallel = StyleSheet.from_files(self.files, workers=2)
+        self.assertEqual(serial._index, parallel._index)
+        self.assertEqual(serial._rules, parallel._rules)
+        named = Name(name="name", classes=["name"])
+        parallel.attach(named)
+        self.assertEqual((named.value, named.sticky), (4, 9))
+        named = Name(name="name")
+        parallel.attach(named)
+        self.assertEqual(named.value, 8)
+
+    def test_02_attach(self):
+        """Parallel Matching Styles Like Serial"""
+        css = StyleSheet.from_files(self.files)
+        for share in (True, False):
+            css.share_styles = share
+            (serial, parallel) = (make_tree(3, 4), make_tree(3, 4))
+            css.attach_all(serial)
+            css.attach_all(parallel, workers=2)
+            for (one, two) in zip(walk(serial), walk(parallel)):
+                self.assertEqual(one._css[2:], two._css[2:])
+                self.assertEqual((one.value, one.sticky),
+                                 (two.value, two.sticky))
+            parallel.children[0].name = "other"
+            self.assertEqual(parallel.children[0].children[0].value, 4)
+
+
+if __name__ == '__main__':
+    test_support.run_unittest(
+       ParallelTestCase,
+    )
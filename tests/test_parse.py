@@ -21,7 +21,10 @@ import sys
 sys.path.insert(0, '../')
 
 import unittest
-from sterling.csslavie.parse import _parse_css
+import cPickle as pickle
+from sterling.csslavie.parse import _parse_css, CssSyntaxError, \
+    CssValueFilters, GLOBAL_FILTERS, FilterRejection
+from sterling.csslavie import Length, Color, Url
 try:
     from test import test_support
 except ImportError:
@@ -56,6 +59,71 @@ class ParseTestCase(unittest.TestCase):
         self.assertEqual( css[4][0][0], 'name #parent' )
         self.assertEqual( css[4][0][1], 'name #child' )
 
+    def test_03_tokens(self):
+        """Comments, Strings and Pseudo Selectors"""
+        css = _parse_css('a>b, c:hover { x: url("http://a;b"); y: 1.5 }\n'
+                         '/* } */ d { z: 1; /* y: 2; */ w: true }')
+        self.assertEqual( css[0][0], ['a', '>', 'b'] )
+        self.assertEqual( css[1][0], ['c :hover'] )
+        self.assertEqual( css[0][1], {'x': 'url("http://a;b")', 'y': 1.5} )
+        self.assertTrue( css[0][1] is css[1][1] )
+        self.assertEqual( css[2][1], {'z': 1, 'w': True} )
+
+    def test_04_errors(self):
+        """Error Line and Column"""
+        for (content, line, column) in [
+                ('a {\n  x 1;\n}', 2, 6),
+                ('a { x: 1; }\n}', 2, 1),
+                ('a {\n  x: 1;\n  /* open', 3, 3),
+                ('a { b { x: 1; } }', 1, 7),
+                ('a { x: 1;', 1, 10),
+            ]:
+            with self.assertRaises(CssSyntaxError) as ctx:
+                _parse_css(content)
+            self.assertEqual( (ctx.exception.line, ctx.exception.column),
+                              (line, column) )
+
+    def test_05_values(self):
+        """Typed Lengths, Colours and Urls"""
+        css = _parse_css('a { w: 10px; h: -1.5EM; c: #f00; d: #11223380; '
+                         'e: rgba(1, 2, 3, 0.5); f: Red; g: url( "x.png" ); '
+                         'n: 1.5e3; s: 10 px; t: #ggg }')
+        style = css[0][1]
+        self.assertEqual( style['w'], '10px' )
+        self.assertEqual( (style['w'].value, style['w'].unit), (10, 'px') )
+        self.assertEqual( (style['h'].value, style['h'].unit), (-1.5, 'em') )
+        self.assertEqual( style['c'].rgba, (255, 0, 0, 255) )
+        self.assertEqual( style['d'].rgba, (17, 34, 51, 128) )
+        self.assertEqual( style['e'].rgba, (1, 2, 3, 128) )
+        self.assertEqual( style['f'].rgba, (255, 0, 0, 255) )
+        self.assertEqual( style['g'].url, 'x.png' )
+        self.assertEqual( style['n'], 1500.0 )
+        self.assertEqual( type(style['s']), str )
+        self.assertEqual( type(style['t']), str )
+        self.assertRaises(AttributeError, setattr, style['w'], 'value', 1)
+        copy = pickle.loads(pickle.dumps(style['w'], 2))
+        self.assertEqual( (copy, type(copy), copy.value), ('10px', Length, 10) )
+
+    def test_06_memo(self):
+        """Each distinct value is filtered once and shared"""
+        calls = []
+        def counting(value):
+            calls.append(value)
+            raise FilterRejection()
+        filters = CssValueFilters(counting, *GLOBAL_FILTERS)
+        first = filters(''.join(['#', 'abc']))
+        self.assertTrue( filters('#abc') is first )
+        self.assertEqual( filters('plain'), 'plain' )
+        filters('plain')
+        self.assertEqual( calls, ['#abc', 'plain'] )
+        self.assertTrue( isinstance(first, Color) )
+        filters.insert(0, lambda value: value.upper())
+        self.assertEqual( filters('plain'), 'PLAIN' )
+        filters[0] = lambda value: value * 2
+        self.assertEqual( filters('plain'), 'plainplain' )
+        del filters[0]
+        self.assertEqual( filters('plain'), 'plain' )
+
 
 if __name__ == '__main__':
     test_support.run_unittest(
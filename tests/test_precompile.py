@@ -0,0 +1,102 @@
+import os
+import shutil
+import tempfile
+import unittest
+import cPickle as pickle
+
+from sterling import app, backends, precompile
+from sterling.backends import null
+from sterling.model import Model
+from sterling.csslavie.parse import Names
+
+
+class Hello(Model):
+    def __init__(self):
+        super(Hello, self).__init__()
+        self.first = 'hello'
+        self.last = 'goodbye'
+
+
+class PrecompileTestCase(unittest.TestCase):
+    """Test frames and stylesheets compiled ahead of time"""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.write('hello.xml', '<window><button text="first" />'
+                   '<include src="row.xml" /></window>')
+        self.write('row.xml', '<button class="last" text="last" />')
+        self.write('hello.css', 'window { horizontal: true; }\n'
+                   'window .last { weight: 2; }\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def path(self, name):
+        return os.path.join(self.dir, name)
+
+    def write(self, name, content):
+        with open(self.path(name), 'w') as fhl:
+            fhl.write(content)
+
+    def test_01_compile(self):
+        """The command line writes a file with the styled frame tree"""
+        self.assertEqual(precompile.main([self.path('hello.xml')]), 0)
+        fr, sheet, css = precompile.load(self.path('hello.sterling'))
+        self.assertEqual(css, self.path('hello.css'))
+        self.assertEqual(fr.horizontal, True)
+        include = fr.children[1]
+        self.assertEqual(include.frame.weight, 2)
+        self.assertTrue(fr._css[0] is sheet)
+        self.assertEqual(fr.plan().children, tuple(fr.children))
+
+    def test_02_reload(self):
+        """A loaded stylesheet still restyles the loaded frames"""
+        fr, sheet = precompile.compile_frame(self.path('hello.xml'),
+                                             self.path('hello.css'))
+        precompile.save(self.path('out'), fr, sheet)
+        fr, sheet, css = precompile.load(self.path('out'))
+        self.assertEqual(css, None)
+        self.assertEqual(fr._css[1]._signature, None)
+        sheet.reload('window { horizontal: false; }\n'
+                     'window .last { weight: 3; }\n')
+        self.assertEqual(fr.horizontal, False)
+        self.assertEqual(fr.children[1].frame.weight, 3)
+
+    def test_03_format(self):
+        """Files from another version are refused"""
+        with open(self.path('old'), 'wb') as fhl:
+            pickle.dump({'format': -1}, fhl)
+        self.assertRaises(ValueError, precompile.load, self.path('old'))
+
+    def test_04_names(self):
+        """Pickled names don't keep their signature"""
+        names = Names()
+        names.add('a')
+        names.set_parent(Names())
+        table = {}
+        names.signature(table)
+        copy = pickle.loads(pickle.dumps(names, 2))
+        self.assertEqual(copy, names)
+        self.assertEqual(copy._signature, None)
+        self.assertEqual(copy.parent, names.parent)
+        self.assertEqual(copy.signature(table), names.signature(table))
+
+    def test_05_watch(self):
+        """Only compiled files knowing their stylesheet can be watched"""
+        fr, sheet = precompile.compile_frame(self.path('hello.xml'),
+                                             self.path('hello.css'))
+        precompile.save(self.path('bare'), fr, sheet)
+        precompile.save(self.path('kept'), fr, sheet, self.path('hello.css'))
+        previous = backends._current
+        try:
+            toolkit = null.Backend()
+            self.assertRaises(ValueError, app.run, Hello(), watch=True,
+                              backend=toolkit, compiled=self.path('bare'))
+            self.assertEqual(toolkit.windows, [])
+            app.run(Hello(), watch=True, backend=toolkit,
+                    compiled=self.path('kept'))
+            app.run(Hello(), stylesheet=self.path('hello.css'), watch=True,
+                    backend=toolkit, compiled=self.path('bare'))
+            self.assertEqual(len(toolkit.windows), 2)
+        finally:
+            backends._current = previous
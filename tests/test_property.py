@@ -21,8 +21,10 @@ import sys
 sys.path.insert(0, '../')
 sys.path.insert(0, '.')
 
+import random
 import unittest
 from sterling.csslavie import PropertyObject
+from sterling.csslavie.base import Layers, DefaultOrderedDict
 try:
     from test import test_support
 except ImportError:
@@ -83,8 +85,84 @@ class PropertyTestCase(unittest.TestCase):
         del self.p.foo
         self.assertEqual(self.p.foo, 2)
 
+    def test_09_class_attr(self):
+        """Layers hide class attributes"""
+        class Classy(PropertyObject):
+            foo = 0
+        p = Classy()
+        p.add_to({'foo': 2})
+        self.assertEqual(p.foo, 2)
+        p.remove('base')
+        self.assertEqual(p.foo, 0)
+
+    def test_10_shared(self):
+        """Shared layers are never changed"""
+        style = {'foo': 5}
+        self.p.add_to(style, 'hover', shared=True)
+        self.assertTrue(self.p._layers.get('hover') is style)
+        self.p.add_to({'foo': 6}, 'hover')
+        self.assertEqual(self.p.foo, 6)
+        self.assertEqual(style, {'foo': 5})
+
+    def test_11_missing(self):
+        """Missing attributes and unused watchers"""
+        self.p.remove('base')
+        self.assertFalse(hasattr(self.p, 'foo'))
+        self.assertEqual(self.p._watch, None)
+
          
 
+    def test_12_winners(self):
+        """Top most layer wins after any changes"""
+        layers = Layers()
+        rnd = random.Random(4)
+        for _ in range(500):
+            name = rnd.choice('abcd')
+            keys = rnd.sample('uvwxyz', 3)
+            action = rnd.random()
+            if action < 0.5:
+                layers.update(name, dict((k, rnd.random()) for k in keys))
+            elif action < 0.7 and name in layers:
+                layers.pop(name)
+            elif name in layers:
+                layers.discard(name, keys)
+            for key in 'uvwxyz':
+                expect = None
+                for d in reversed(layers.dicts):
+                    if key in d:
+                        expect = d[key]
+                        break
+                self.assertEqual(layers.super_get(key), expect)
+
+    def test_13_watch(self):
+        """Every change fires the watchers"""
+        fired = []
+        record = lambda obj, key, value: fired.append((key, value))
+        self.p.watch(record, 'foo')
+        self.p.add_to({'foo': 5, 'bar': 1}, 'hover')
+        self.p.add_to({'foo': 5}, 'hover')
+        self.p.foo = 12
+        self.p.foo = 12
+        self.p.add_to({'foo': 6}, 'down')
+        del self.p.foo
+        self.p.remove('down')
+        self.p.unwatch(record, 'foo')
+        self.p.foo = 1
+        self.assertEqual(fired, [('foo', 5), ('foo', 12), ('foo', 6),
+                                 ('foo', 5)])
+
+    def test_14_cached(self):
+        """Winning layered values are kept in __dict__"""
+        self.assertEqual(self.p.__dict__['foo'], 2)
+        self.p.add_to({'foo': 5}, 'hover')
+        self.assertEqual(self.p.__dict__['foo'], 5)
+        self.p.remove('hover')
+        self.assertEqual(self.p.__dict__['foo'], 2)
+        self.p.remove('base')
+        self.assertFalse('foo' in self.p.__dict__)
+        self.assertRaises(AttributeError, getattr, self.p, 'foo')
+        self.assertEqual(DefaultOrderedDict(list)['foo'], [])
+
 
 if __name__ == '__main__':
     test_support.run_unittest(
@@ -0,0 +1,131 @@
+#!/usr/bin/python
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+
+import os
+import sys
+import shutil
+import tempfile
+
+sys.path.insert(0, '../')
+
+import unittest
+from sterling.csslavie import CssParser, CssSyntaxError, PropertyObject
+from sterling.csslavie.watch import FileWatcher
+try:
+    from test import test_support
+except ImportError:
+    from test import support as test_support
+
+
+class Name(PropertyObject):
+    pass
+
+
+class ReloadTestCase(unittest.TestCase):
+    """Test reloading a stylesheet with objects attached."""
+    def setUp(self):
+        with open("data/test1.css", 'r') as fhl:
+            self.content = fhl.read()
+        self.css = CssParser("data/test1.css")
+        self.fired = []
+        self.child = Name(name="child")
+        self.other = Name(name="other")
+        self.parent = Name(name="parent")
+        self.parent.children = [self.child, self.other]
+        self.css.attach_all(self.parent)
+        for obj in (self.parent, self.child, self.other):
+            obj.watch(self.record, 'value')
+            obj.watch(self.record, 'second_value')
+
+    def record(self, obj, key, value):
+        self.fired.append((obj.name, key, value))
+
+    def test_01_changed(self):
+        """Changed values are pushed"""
+        self.css.reload(self.content.replace('value: 6;', 'value: 60;'))
+        self.assertEqual(self.child.value, 60)
+        self.assertEqual(self.fired, [('child', 'value', 60)])
+
+    def test_02_removed(self):
+        """Removed rules are taken away"""
+        self.css.reload(self.content.replace('#parent {', 'unused {'))
+        self.assertFalse(hasattr(self.parent, 'second_value'))
+        self.assertEqual(self.child.second_value, 7)
+        self.assertEqual(self.fired, [('parent', 'second_value', None)])
+
+    def test_03_added(self):
+        """Added rules are matched"""
+        self.css.reload(self.content + '\n#other { value: 9; }')
+        self.assertEqual(self.other.value, 9)
+        self.assertEqual(self.child.value, 6)
+        self.assertEqual(self.fired, [('other', 'value', 9)])
+
+    def test_04_error(self):
+        """Bad content leaves the stylesheet as it was"""
+        self.assertRaises(CssSyntaxError, self.css.reload, 'name { value: 8;')
+        self.assertEqual(self.child.value, 6)
+        self.css.reload(self.content)
+        self.assertEqual(self.fired, [])
+
+
+class WatchTestCase(unittest.TestCase):
+    """Test the debounced file watcher."""
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.dir, 'test.css')
+        shutil.copy("data/test1.css", self.filename)
+        self.css = CssParser(self.filename)
+        self.named = Name(name="name")
+        self.css.attach(self.named)
+        self.now = 100.0
+        self.watcher = FileWatcher(self.css, self.filename, debounce=1.0,
+                                   clock=lambda: self.now)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write(self, extra):
+        with open(self.filename, 'a') as fhl:
+            fhl.write(extra)
+
+    def test_01_unchanged(self):
+        """Nothing to reload"""
+        self.now += 5
+        self.assertFalse(self.watcher.poll())
+
+    def test_02_debounce(self):
+        """Reload once the file settles"""
+        self.write('#name { value: 20; }')
+        self.assertFalse(self.watcher.poll())
+        self.now += 0.5
+        self.write('\n')
+        self.assertFalse(self.watcher.poll())
+        self.now += 0.9
+        self.assertFalse(self.watcher.poll())
+        self.assertEqual(self.named.value, 2)
+        self.now += 0.2
+        self.assertTrue(self.watcher.poll())
+        self.assertEqual(self.named.value, 20)
+        self.now += 5
+        self.assertFalse(self.watcher.poll())
+
+
+if __name__ == '__main__':
+    test_support.run_unittest(
+       ReloadTestCase,
+       WatchTestCase,
+    )
@@ -0,0 +1,92 @@
+import unittest
+
+from sterling.model import Model
+from sterling.scheduler import Scheduler, ManualLoop
+
+
+class SchedulerTestCase(unittest.TestCase):
+    """Test dirty models are flushed once per loop iteration."""
+
+    def setUp(self):
+        self.loop = ManualLoop()
+        self.scheduler = Scheduler(self.loop, clock=self.loop.clock)
+        self.model = Model()
+        self.called = 0
+        self.model.subscribe('foo', self.set_called)
+
+    def set_called(self, model):
+        self.called += 1
+
+    def test_01_coalesced(self):
+        """A burst of events is flushed once, on the next iteration"""
+        for value in range(10):
+            self.model.foo = value
+            self.scheduler.mark(self.model)
+        self.assertEqual(self.called, 0)
+        self.assertEqual(self.loop.iterate(), 1)
+        self.assertEqual(self.called, 1)
+        self.assertEqual((self.scheduler.marked, self.scheduler.coalesced,
+                          self.scheduler.flushes), (10, 9, 1))
+        self.assertEqual(self.loop.iterate(), 0)
+
+    def test_02_several_models(self):
+        """Every dirty model is flushed in the order marked"""
+        other = Model()
+        calls = []
+        other.subscribe('foo', lambda m: calls.append('other'))
+        self.model.subscribe('foo', lambda m: calls.append('model'))
+        other.foo = self.model.foo = 1
+        self.scheduler.mark(other)
+        self.scheduler.mark(self.model)
+        self.scheduler.mark(other)
+        self.loop.iterate()
+        self.assertEqual(calls, ['other', 'model'])
+
+    def test_03_rate(self):
+        """Flushes are held back to min_interval apart"""
+        self.scheduler.min_interval = 0.1
+        self.model.foo = 1
+        self.scheduler.mark(self.model)
+        self.loop.iterate()
+        self.model.foo = 2
+        self.scheduler.mark(self.model)
+        self.assertEqual(self.loop.iterate(0.05), 0)
+        self.assertEqual(self.called, 1)
+        self.assertEqual(self.loop.iterate(0.05), 1)
+        self.assertEqual(self.called, 2)
+
+    def test_04_no_hook(self):
+        """Without a loop hook marking flushes straight away"""
+        scheduler = Scheduler()
+        self.model.foo = 1
+        scheduler.mark(self.model)
+        self.assertEqual((self.called, scheduler.flushes), (1, 1))
+
+    def test_05_styles(self):
+        """Style changes repaint each widget once per flush"""
+        class Painted(object):
+            def __init__(self):
+                self.painted = []
+
+            def restyle(self, keys):
+                self.painted.append(sorted(keys))
+        (one, two) = (Painted(), Painted())
+        for key in ('horizontal', 'disabled', 'horizontal'):
+            self.scheduler.mark_style(one, key)
+        self.scheduler.mark_style(two, 'disabled')
+        self.scheduler.mark(self.model)
+        self.assertEqual(one.painted, [])
+        self.assertEqual(self.loop.iterate(), 1)
+        self.assertEqual(one.painted, [['disabled', 'horizontal']])
+        self.assertEqual(two.painted, [['disabled']])
+        self.assertEqual((self.scheduler.style_changes, self.scheduler.repaints,
+                          self.scheduler.flushes), (4, 2, 1))
+
+    def test_06_hook(self):
+        """A new hook schedules the flush the old one was given again"""
+        self.model.foo = 1
+        self.scheduler.mark(self.model)
+        self.scheduler.hook = None
+        self.assertEqual(self.called, 0)
+        self.scheduler.mark(self.model)
+        self.assertEqual(self.called, 1)
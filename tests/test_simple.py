@@ -22,6 +22,7 @@ sys.path.insert(0, '../')
 
 import unittest
 from sterling.csslavie import CssParser, PropertyObject
+from sterling.csslavie.parse import Selector, StyleSheet
 try:
     from test import test_support
 except ImportError:
@@ -94,7 +95,10 @@ class SimpleTestCase(unittest.TestCase):
         
         self.css.attach_all(named)
         self.assertEqual(named.value, 1)
-        self.assertEqual(child.value, 5)
+        # The later, equally specific, descendant rule wins over the child
+        # rule, which still matches
+        self.assertEqual(child.value, 6)
+        self.assertEqual(len(child._css[2]), 4)
 
     def test_07_indirect_parent(self):
         """Parent Child Child Rule"""
@@ -124,6 +128,169 @@ class SimpleTestCase(unittest.TestCase):
         self.assertEqual(child.second_value, 7)
         self.assertFalse(hasattr(two, 'second_value'))
 
+    def test_09_index(self):
+        """Indexed Rules Match Full Scan"""
+        for (name, classes) in [(None, None), ('name', None), ('child', None),
+                                ('name', ['name']), ('other', ['other'])]:
+            named = Name(name=name, classes=classes)
+            names = self.css.attach(named)
+            scan = [r for r in self.css._rules if names.match(r[0])]
+            indexed = [self.css._rules[p] for p in self.css._candidates(names)
+                       if names.match(self.css._rules[p][0])]
+            self.assertEqual(scan, indexed)
+
+    def test_10_no_ancestor(self):
+        """Parent Child Rule Without The Parent"""
+        child  = Name(name="child")
+        middle = Name(name="middle")
+        middle.children = [child]
+        other = Name(name="other")
+        other.children = [middle]
+
+        self.css.attach_all(other)
+        self.assertEqual(child.value, 1)
+
+    def test_11_selector(self):
+        """Compiled Selectors"""
+        selector = Selector.compile(['name #parent', '>', 'name #child'])
+        self.assertEqual(selector, (
+            (frozenset(['name', '#child']), None),
+            (frozenset(['name', '#parent']), '>'),
+        ))
+        self.assertEqual(selector.key(), '#child')
+        self.assertEqual(Selector.compile(str(selector)), selector)
+        self.assertEqual(Selector.compile('a*b .c*>*d').key(), 'd')
+
+    def test_12_shared(self):
+        """Siblings Share Styles"""
+        parent = Name(name="parent")
+        parent.children = [Name(name="child") for _ in range(10)]
+        parent.children.append(Name(name="other"))
+        self.css.attach_all(parent)
+        self.assertEqual([c.value for c in parent.children], [6] * 10 + [1])
+        self.assertEqual(len(self.css._shared), 3)
+
+        shared = CssParser("data/test1.css")
+        shared.share_styles = False
+        named = Name(name="name", classes=["name"])
+        shared.attach(named)
+        self.assertEqual(named.value, 4)
+        self.assertEqual(shared._shared, {})
+
+
+    def test_13_restyle(self):
+        """Restyle On Name And Class Changes"""
+        named = Name(name="name")
+        self.css.attach(named)
+        self.assertEqual((named.value, named.second_value), (2, 7))
+        fired = []
+        named.watch(lambda obj, key, value: fired.append((key, value)), 'value')
+        named.classes = ['name']
+        self.assertEqual(named.value, 4)
+        named.name = 'other'
+        self.assertEqual(named.value, 3)
+        self.assertFalse(hasattr(named, 'second_value'))
+        self.assertEqual(fired, [('value', 4), ('value', 3)])
+
+    def test_14_restyle_children(self):
+        """Restyle Descendants On Parent Changes"""
+        child  = Name(name="child")
+        middle = Name(name="middle")
+        middle.children = [child]
+        parent = Name(name="other")
+        parent.children = [middle]
+        self.css.attach_all(parent)
+        self.assertEqual(child.value, 1)
+        parent.name = "parent"
+        self.assertEqual(child.value, 6)
+        self.assertEqual(len(child._css[2]), 3)
+        middle.name = "parent"
+        self.assertEqual((child.value, len(child._css[2])), (6, 4))
+        parent.name = "other"
+        self.assertEqual((child.value, len(child._css[2])), (6, 4))
+        middle.name = "middle"
+        self.assertEqual((child.value, len(child._css[2])), (1, 2))
+
+    def test_15_cascade(self):
+        """Specificity Then Source Order"""
+        self.assertEqual(Selector.compile(['name .a :hover', 'name #b *'])
+                         .specificity(), (1, 2, 2))
+        css = StyleSheet('#name { value: 1; }\n'
+                         'name.name { value: 2; }\n'
+                         'name { value: 3; other: 1; }\n'
+                         '.name { other: 2; }\n'
+                         'name { other: 3; }\n'
+                         '.name { other: 4; }\n')
+        named = Name(name="name", classes=["name"])
+        css.attach(named)
+        self.assertEqual((named.value, named.other), (1, 4))
+        css.reload('.name { other: 4; }\nname.name { value: 2; }\n'
+                   '.name { other: 5; }\n')
+        self.assertEqual((named.value, named.other), (2, 5))
+
+    def test_16_deep(self):
+        """Trees Deeper Than The Recursion Limit"""
+        parent = item = Name(name="parent")
+        for _ in range(sys.getrecursionlimit() + 100):
+            item.children = [Name()]
+            item = item.children[0]
+        item.children = [Name(name="child")]
+        self.css.attach_all(parent)
+        self.assertEqual((item.value, item.children[0].value), (1, 6))
+
+    def test_17_ancestry(self):
+        """Parents Without A Needed Name Are Not Walked"""
+        child  = Name(name="child")
+        middle = Name(name="middle")
+        middle.children = [child]
+        parent = Name(name="other")
+        parent.children = [middle]
+        self.css.attach_all(parent)
+        walked = []
+        walk = Selector._match_parents
+        Selector._match_parents = lambda *args: walked.append(1) or walk(*args)
+        try:
+            names = child._css[1]
+            for (selector, style) in self.css._rules:
+                self.assertEqual(selector.match(names),
+                                 selector[0][0] <= names and
+                                 walk(selector, names, 1))
+        finally:
+            Selector._match_parents = walk
+        self.assertEqual(walked, [])
+        parent.name = "parent"
+        self.assertEqual(child.value, 6)
+
+    def test_18_signatures(self):
+        """Signatures Are Kept By Each Stylesheet Until Its Rules Change"""
+        other = CssParser("data/test1.css")
+        for n in range(100):
+            self.css.attach(Name(name="n%d" % n))
+        self.assertEqual(len(self.css._signatures), 100)
+        self.assertEqual(other._signatures, {})
+        named = Name(name="name")
+        other.attach(named)
+        self.css.attach(named)
+        self.assertEqual(named.value, 2)
+        self.css.reload('name { value: 8; }')
+        self.assertEqual(len(self.css._signatures), 1)
+        self.assertEqual(named.value, 8)
+
+    def test_19_cascade_fixture(self):
+        """Ids Beat Classes Beat Types, Later Rules Break Ties"""
+        css = CssParser("data/cascade.css")
+        named = Name(name="name", classes=["name"])
+        css.attach(named)
+        self.assertEqual((named.value, named.other, named.third), (1, 1, 2))
+        child = Name(name="child")
+        middle = Name(name="parent")
+        middle.children = [child]
+        parent = Name(name="parent")
+        parent.children = [middle]
+        css.attach_all(parent)
+        self.assertEqual(child.value, 5)
+        middle.name = "middle"
+        self.assertEqual(child.value, 4)
 
 if __name__ == '__main__':
     test_support.run_unittest(
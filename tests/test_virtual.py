@@ -0,0 +1,73 @@
+import unittest
+
+from sterling.model import ListModel
+from sterling.virtual import VirtualRows
+
+
+class Row(object):
+    """Stands in for a row of widgets"""
+    def __init__(self, datum):
+        self.datum = datum
+
+    def bind(self, datum):
+        self.datum = datum
+        return self
+
+
+class VirtualRowsTestCase(unittest.TestCase):
+    """Test only the rows in view are built, and are reused"""
+
+    def rows(self, data, **kw):
+        return VirtualRows(data, Row, Row.bind, **kw)
+
+    def shown(self, virtual):
+        return [row.datum for row in virtual.rows]
+
+    def test_01_window(self):
+        """Rows cover the view plus overscan, clipped to the data"""
+        virtual = self.rows(range(1000), size=10, overscan=5)
+        self.assertEqual((virtual.start, virtual.stop), (0, 15))
+        self.assertEqual(self.shown(virtual), range(15))
+        virtual.scroll_to(100)
+        self.assertEqual(self.shown(virtual), range(95, 115))
+        virtual.scroll_to(5000)
+        self.assertEqual(self.shown(virtual), range(985, 1000))
+        self.assertEqual(self.shown(self.rows(range(3))), [0, 1, 2])
+
+    def test_02_recycled(self):
+        """Scrolling reuses the rows leaving the window"""
+        virtual = self.rows(range(1000), size=10, overscan=5)
+        for first in range(0, 900, 7):
+            virtual.scroll_to(first)
+        self.assertEqual(virtual.made, 20)
+        self.assertTrue(virtual.recycled > 0)
+        self.assertFalse(virtual.scroll_to(first))
+
+    def test_03_model(self):
+        """Changes to a collection model rebind only the rows that moved"""
+        model = ListModel(range(100))
+        virtual = self.rows(model, size=10, overscan=0)
+        model[50] = 'x'
+        self.assertFalse(virtual.update())
+        model[5] = 'y'
+        self.assertTrue(virtual.update())
+        self.assertEqual(virtual.recycled, 1)
+        del model[0]
+        virtual.update()
+        self.assertEqual(self.shown(virtual), list(model)[:10])
+        self.assertEqual(virtual.made, 10)
+
+    def test_04_constant(self):
+        """A million rows build and recycle as many rows as a hundred"""
+        def build(count):
+            virtual = self.rows(range(count), size=10, overscan=5)
+            made = virtual.made
+            for first in range(0, 80, 3):
+                virtual.scroll_to(first)
+            return made, virtual.made, virtual.recycled
+        small, big = build(100), build(1000000)
+        self.assertEqual(small, big)
+        self.assertEqual(small[0], 15)
+        self.assertTrue(small[1] <= 10 + 2 * 5)
+        self.assertEqual(self.rows(range(50)).made, 50)
+        self.assertEqual(self.rows(range(1000000)).made, 60)